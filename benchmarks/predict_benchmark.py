@@ -0,0 +1,65 @@
+"""
+Single-sample CPU latency of `model.predict` against the compiled
+forward pass (`emg_pipeline.CompiledPredictor`).
+
+Run from the repository root:
+    python benchmarks/predict_benchmark.py weights/cnn_emg_model_all_1.h5
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "-1")  # CPU only, like the deployment boxes
+
+import tensorflow as tf  # noqa: E402
+from emg_pipeline import CompiledPredictor  # noqa: E402
+
+
+def time_calls(fn, x, runs):
+    """Per-call latencies in ms."""
+    latencies = np.empty(runs)
+    for i in range(runs):
+        start = time.perf_counter()
+        fn(x)
+        latencies[i] = (time.perf_counter() - start) * 1000
+    return latencies
+
+
+def report(name, latencies):
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    print(f"{name:<22} mean {latencies.mean():7.3f} ms  p50 {p50:7.3f}  p95 {p95:7.3f}  p99 {p99:7.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("model_path", help="trained Keras .h5 model")
+    parser.add_argument("--runs", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=20)
+    args = parser.parse_args()
+
+    model = tf.keras.models.load_model(args.model_path, compile=False)
+    x = np.random.default_rng(0).normal(size=(1,) + model.input_shape[1:]).astype(np.float32)
+
+    start = time.perf_counter()
+    compiled = CompiledPredictor(model)
+    print(f"model input {model.input_shape}, trace + warmup {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    candidates = [
+        ("model.predict", lambda v: model.predict(v, verbose=0)),
+        ("model(x) eager", lambda v: model(v, training=False).numpy()),
+        ("CompiledPredictor", compiled),
+    ]
+    for name, fn in candidates:
+        time_calls(fn, x, args.warmup)
+        report(name, time_calls(fn, x, args.runs))
+
+    diff = np.abs(compiled(x) - model.predict(x, verbose=0)).max()
+    print(f"max |compiled - predict| = {diff:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Offline check of the streaming (stateful) recurrent model against the
+full-sequence model it is built from (`emg_pipeline.StreamingRecurrentPredictor`).
+
+Run from the repository root:
+    python benchmarks/streaming_rnn_check.py new_collect/fzh/rnn_emg_model.h5 --csv "new_collect/fzh/sensor_data*.csv"
+
+Every continuous recording is replayed through the live path of
+inference.py: samples go into a RingBuffer in serial-sized chunks, the
+motion gate and the feature cache are updated as in `data_preprocess`,
+and each new window is fed to the streaming model with
+`StreamingRecurrentPredictor.tick` as in `stream_windows`, so the state
+is only reset at a gesture onset (once per recording with --no-gate).
+Each output is compared with the full model on the matching sliding
+19-window input. The tick right after a reset must match; later ticks
+carry state from windows the full model no longer sees, and their
+maximum deviation and argmax agreement are reported by windows since the
+reset. Per-tick cost of both is reported.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "-1")
+
+from emg_pipeline import (  # noqa: E402
+    CompiledPredictor, MotionGate, NoiseSource, RingBuffer, StreamingFeatureCache, StreamingRecurrentPredictor,
+    count_windows,
+)
+
+# window and gate parameters of inference.py
+WINDOW_SIZE = 1000
+STRIDE = 50
+TIME_STEPS = 100
+NUM_CHANNELS = 10
+NUM_WINDOWS = count_windows(WINDOW_SIZE, TIME_STEPS, STRIDE)
+GATE_THRESHOLD = 5000
+GATE_DELAY_SAMPLES = 751
+GATE_HOLD_SAMPLES = 950
+BUCKETS = ((0, 1), (1, 20), (20, 100), (100, None))  # new windows since the reset
+
+
+def replay(samples, streaming, full, args, ticks):
+    """Feeds one recording through the live streaming path; appends (windows since reset, |diff|, agree, ms, ms)."""
+    buffer = RingBuffer(5000, NUM_CHANNELS)
+    feature_cache = StreamingFeatureCache(NUM_WINDOWS, TIME_STEPS, STRIDE, NUM_CHANNELS,
+                                          num_replaced=args.num_replaced, noise=NoiseSource(seed=0))
+    gate = MotionGate((8, 9), GATE_THRESHOLD, hold_samples=GATE_HOLD_SAMPLES, delay_samples=GATE_DELAY_SAMPLES)
+    streaming.reset()
+    next_total = WINDOW_SIZE
+    for i in range(0, len(samples), args.chunk):
+        chunk = samples[i:i + args.chunk]
+        buffer.extend(chunk)
+        gate.update(chunk)
+        total = buffer.total
+        if total < next_total:
+            continue
+        next_total = total - (total - TIME_STEPS) % STRIDE + STRIDE
+        if not args.no_gate and not gate.is_open:
+            continue
+        new_windows = feature_cache.update(buffer)
+        if not feature_cache.ready:
+            continue
+        model_input = feature_cache.model_input()
+        start = time.perf_counter()
+        output = streaming.tick(model_input[0], new_windows, 0 if args.no_gate else gate.onset_sample)
+        step_ms = (time.perf_counter() - start) * 1000
+        if output is None:
+            continue
+        start = time.perf_counter()
+        reference = full(model_input)
+        full_ms = (time.perf_counter() - start) * 1000
+        ticks.append((streaming.steps - NUM_WINDOWS, np.abs(output - reference).max(),
+                      np.argmax(output) == np.argmax(reference), step_ms, full_ms))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("model_path", help="trained recurrent Keras .h5 model")
+    parser.add_argument("--csv", default="new_collect/*/sensor_data*.csv", help="continuous recordings to replay")
+    parser.add_argument("--num-replaced", type=int, default=4)
+    parser.add_argument("--chunk", type=int, default=25, help="samples per serial read")
+    parser.add_argument("--no-gate", action="store_true", help="stream every window, resetting once per recording")
+    parser.add_argument("--recordings", type=int, default=0, help="recordings replayed (0: all)")
+    parser.add_argument("--atol", type=float, default=1e-4, help="tolerance on the tick right after a reset")
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(args.csv))[:args.recordings or None]
+    if not paths:
+        sys.exit(f"no recording matches {args.csv!r}")
+
+    streaming = StreamingRecurrentPredictor(args.model_path)
+    full = CompiledPredictor(streaming.full_model, input_shape=(NUM_WINDOWS, TIME_STEPS * NUM_CHANNELS))
+
+    ticks = []
+    for path in paths:
+        data = np.loadtxt(path, delimiter=",", ndmin=2)
+        replay(np.clip(data[:, 1:11], -32768, 32767).astype(np.int16), streaming, full, args, ticks)
+    if not ticks:
+        sys.exit("no tick reached the model (the motion gate never opened; try --no-gate)")
+    since, diff, agree, step_ms, full_ms = (np.asarray(column) for column in zip(*ticks))
+
+    print(f"{len(paths)} recordings, {len(ticks)} ticks, {int((since == 0).sum())} resets")
+    print(f"max |streaming - full| over all ticks: {diff.max():.2e}, argmax agreement {agree.mean():.1%}")
+    for low, high in BUCKETS:
+        mask = (since >= low) if high is None else (since >= low) & (since < high)
+        if mask.any():
+            label = f"{low}+" if high is None else (f"{low}" if high == low + 1 else f"{low}-{high - 1}")
+            print(f"  {label:>6} windows since reset: {int(mask.sum()):6d} ticks, "
+                  f"max |diff| {diff[mask].max():.2e}, mean {diff[mask].mean():.2e}, "
+                  f"argmax agreement {agree[mask].mean():.1%}")
+    full_p50, step_p50 = np.percentile(full_ms, 50), np.percentile(step_ms, 50)
+    print(f"per tick p50: full sequence {full_p50:.3f} ms, streaming step {step_p50:.3f} ms "
+          f"({full_p50 / step_p50:.1f}x)")
+    reset_diff = diff[since == 0].max()
+    if reset_diff > args.atol:
+        sys.exit(f"streaming output right after a reset differs from the full model by {reset_diff:.2e} (> {args.atol})")
+
+
+if __name__ == "__main__":
+    main()
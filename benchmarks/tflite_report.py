@@ -0,0 +1,77 @@
+"""
+Accuracy / latency comparison of a Keras gesture model against its TFLite
+exports (see export_tflite.py).
+
+Run from the repository root:
+    python benchmarks/tflite_report.py weights/cnn_emg_model_all_1.h5 --data new_collect
+
+Every <model>.tflite, <model>_dynamic.tflite and <model>_int8.tflite found
+next to the .h5 file is evaluated on the same preprocessed samples.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "-1")
+
+from emg_pipeline import (  # noqa: E402
+    NoiseSource, QUANTIZE_MODES, load_gesture_sets, load_predictor, prepare_model_inputs,
+)
+
+
+def evaluate(predictor, X, runs):
+    """Predicted classes for every sample and per-call latencies (ms) of the first `runs`."""
+    predicted = np.empty(len(X), dtype=np.int64)
+    latencies = []
+    for i, sample in enumerate(X):
+        start = time.perf_counter()
+        output = predictor(sample[np.newaxis])
+        if i < runs:
+            latencies.append((time.perf_counter() - start) * 1000)
+        predicted[i] = np.argmax(output)
+    return predicted, np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("model_path", help="trained Keras .h5 model")
+    parser.add_argument("--data", default="new_collect", help="folder with processed_gesture_data.npy sets")
+    parser.add_argument("--num-replaced", type=int, default=4)
+    parser.add_argument("--runs", type=int, default=300, help="samples timed per backend")
+    parser.add_argument("--threads", type=int, default=1, help="TFLite interpreter threads")
+    args = parser.parse_args()
+
+    X, y = load_gesture_sets(args.data)
+    X = prepare_model_inputs(X, args.num_replaced, noise=NoiseSource(seed=0))
+    labels = np.unique(y, return_inverse=True)[1]  # same encoding as LabelEncoder in the notebooks
+    print(f"samples {X.shape}, classes {labels.max() + 1}")
+
+    base = os.path.splitext(args.model_path)[0]
+    candidates = [("keras", "keras", args.model_path)]
+    for mode in QUANTIZE_MODES:
+        path = base + (".tflite" if mode == "none" else f"_{mode}.tflite")
+        if os.path.exists(path):
+            candidates.append((f"tflite/{mode}", "tflite", path))
+
+    reference = None
+    print(f"{'backend':<16}{'size KiB':>10}{'load ms':>10}{'accuracy':>10}{'agree':>8}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for name, backend, path in candidates:
+        start = time.perf_counter()
+        predictor = load_predictor(path, backend, num_threads=args.threads)
+        load_ms = (time.perf_counter() - start) * 1000
+        predicted, latencies = evaluate(predictor, X, args.runs)
+        if reference is None:
+            reference = predicted
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        print(f"{name:<16}{os.path.getsize(path) / 1024:>10.1f}{load_ms:>10.1f}"
+              f"{np.mean(predicted == labels):>10.4f}{np.mean(predicted == reference):>8.3f}"
+              f"{p50:>9.3f}{p95:>9.3f}{p99:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
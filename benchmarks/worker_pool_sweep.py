@@ -0,0 +1,79 @@
+"""
+Throughput / tail-latency sweep of the multi-process inference pool
+(`emg_pipeline.WorkerPool`) over worker count K and intra-op threads.
+
+Run from the repository root:
+    python benchmarks/worker_pool_sweep.py weights/cnn_emg_model_all_1.h5 --workers 1 2 4 --threads 1 2 4
+
+Each configuration is driven closed-loop by 2*K client threads that submit
+single (1, 19, 1000) inputs back to back for --seconds. Configurations
+needing more CPUs than available are skipped unless --oversubscribe is set.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from emg_pipeline import WorkerPool  # noqa: E402
+
+
+def drive(pool, x, num_clients, seconds):
+    """Closed-loop load; returns (completed requests, latencies in ms)."""
+    latencies = [[] for _ in range(num_clients)]
+    deadline = time.perf_counter() + seconds
+
+    def client(out):
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            pool(x)
+            out.append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=client, args=(out,)) for out in latencies]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    merged = np.concatenate([np.asarray(out) for out in latencies])
+    return len(merged), merged
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("model_path")
+    parser.add_argument("--backend", default="keras", choices=("keras", "tflite"))
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--no-affinity", action="store_true", help="do not pin workers to CPUs")
+    parser.add_argument("--oversubscribe", action="store_true")
+    parser.add_argument("--input-shape", type=int, nargs=2, default=[19, 1000])
+    args = parser.parse_args()
+
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    x = np.random.default_rng(0).normal(size=[1] + args.input_shape).astype(np.float32)
+    print(f"{cpus} CPUs, backend {args.backend}, {args.seconds:.0f} s per configuration")
+    print(f"{'K':>3}{'threads':>9}{'req/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+
+    for num_workers in args.workers:
+        for threads in args.threads:
+            if num_workers * threads > cpus and not args.oversubscribe:
+                continue
+            pool = WorkerPool(args.model_path, args.backend, num_workers, threads,
+                              cpu_affinity=None if args.no_affinity else "auto",
+                              input_shape=args.input_shape, num_slots=2 * num_workers)
+            try:
+                drive(pool, x, 2 * num_workers, min(2.0, args.seconds))  # warm up every worker
+                count, latencies = drive(pool, x, 2 * num_workers, args.seconds)
+            finally:
+                pool.close()
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            print(f"{num_workers:>3}{threads:>9}{count / args.seconds:>10.1f}{p50:>9.2f}{p95:>9.2f}{p99:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+Load generator for the Daphne / Channels gesture backend: N simulated
+gloves stream samples at the real rate, and the p50 / p95 / p99 latency
+from the last sample of a prediction window to its gesture message is
+reported together with the server's CPU and RSS.
+
+Run from the repository root against a local server:
+    python benchmarks/ws_load.py --clients 8 --seconds 60 --server-pid <daphne pid>
+or let it start one:
+    python benchmarks/ws_load.py --clients 8 --seconds 60 --spawn
+
+Every client is a producer (ws/gesture/?glove=load-<i>, binary batches as
+sent by inference/arduino_reader.py) plus `--viewers` viewers of that
+glove (ws/gesture/view/load-<i>/). Samples are replayed from the
+sensor_data*.csv recordings, each client starting at a different offset;
+with --synthetic they are random, like consumers2.simulate_data, with a
+gyro burst every 2 s so the motion gate opens. A gesture message's
+input_end is the sample count at which the model input was cut, so its
+latency is measured from the moment the last sample of that input was
+sent: it covers queueing, feature extraction, batching, the forward pass
+and fan-out to the viewer. Viewers acknowledge every --ack-every
+messages like the dashboard does (the server stops writing to a viewer
+with OUTBOUND_WINDOW unacknowledged messages); --ack-every 0 simulates
+viewers that never acknowledge. Localhost only.
+"""
+import argparse
+import asyncio
+import bisect
+import glob
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from urllib.parse import urlparse
+
+import numpy as np
+import websockets
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from emg_pipeline import pack_batch  # noqa: E402
+
+LOCAL_HOSTS = ("localhost", "127.0.0.1", "::1")
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           "inference", "gesture-recognition-backend")
+
+
+def load_recordings(pattern):
+    """(n, 10) int16 samples of every CSV matching `pattern`, concatenated (timestamp column dropped)."""
+    parts = []
+    for path in sorted(glob.glob(pattern)):
+        data = np.loadtxt(path, delimiter=",", ndmin=2)
+        if data.shape[1] >= 11:
+            parts.append(np.clip(data[:, 1:11], -32768, 32767).astype(np.int16))
+    if not parts:
+        raise SystemExit(f"no sensor_data CSV matches {pattern!r} (use --synthetic)")
+    return np.concatenate(parts)
+
+
+def synthetic_samples(count, rate, seed):
+    """Random EMG / IMU samples with a 300 ms gyro burst above the gate threshold every 2 s."""
+    rng = np.random.default_rng(seed)
+    samples = np.empty((count, 10), dtype=np.int16)
+    samples[:, :4] = rng.integers(100, 1000, (count, 4))
+    samples[:, 4:] = rng.integers(-3000, 3000, (count, 6))
+    period = 2 * rate
+    burst = (np.arange(count) % period) < 0.3 * rate
+    samples[burst, 8:10] = 8000
+    return samples
+
+
+class ProcessMonitor:
+    """CPU (% of one core) and RSS of server processes, sampled from /proc once a second."""
+
+    def __init__(self, pids):
+        self.pids = pids
+        self.ticks = os.sysconf("SC_CLK_TCK")
+        self.rss_mb = []
+        self.cpu_percent = []
+
+    def _cpu_seconds(self):
+        total = 0
+        for pid in self.pids:
+            with open(f"/proc/{pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            total += int(fields[11]) + int(fields[12])  # utime + stime
+        return total / self.ticks
+
+    def _rss_mb(self):
+        total = 0
+        for pid in self.pids:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1])
+        return total / 1024
+
+    async def run(self):
+        last_cpu, last_time = self._cpu_seconds(), time.perf_counter()
+        while True:
+            await asyncio.sleep(1.0)
+            cpu, now = self._cpu_seconds(), time.perf_counter()
+            self.cpu_percent.append(100 * (cpu - last_cpu) / (now - last_time))
+            self.rss_mb.append(self._rss_mb())
+            last_cpu, last_time = cpu, now
+
+
+class Glove:
+    """One simulated glove: paced producer plus its viewers."""
+
+    def __init__(self, index, samples, args):
+        self.index = index
+        self.glove = f"load-{index}"
+        self.samples = samples
+        self.args = args
+        self.sent_end = []  # sample count after each batch
+        self.sent_time = []  # perf_counter() when it was sent
+        self.latencies = []  # (received, ms)
+        self.gestures = 0
+        self.waveform_frames = 0
+        self.late_batches = 0
+
+    async def produce(self, base_url, deadline):
+        url = f"{base_url}?glove={self.glove}"
+        batch, rate = self.args.batch, self.args.rate
+        offset = (self.index * 7919 * batch) % max(len(self.samples) - batch, 1)
+        async with websockets.connect(url, max_size=None) as ws:
+            start = time.perf_counter()
+            seq = 0
+            while time.perf_counter() < deadline:
+                target = start + seq / rate
+                delay = target - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                elif delay < -batch / rate:
+                    self.late_batches += 1  # the generator itself cannot keep up
+                i = (offset + seq) % (len(self.samples) - batch)
+                await ws.send(pack_batch(self.samples[i:i + batch], seq))
+                seq += batch
+                self.sent_end.append(seq)
+                self.sent_time.append(time.perf_counter())
+
+    async def view(self, view_url, deadline, measure):
+        ack_every = self.args.ack_every
+        async with websockets.connect(f"{view_url}{self.glove}/", max_size=None) as ws:
+            received_count = 0
+            while True:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    return
+                try:
+                    message = await asyncio.wait_for(ws.recv(), timeout)
+                except asyncio.TimeoutError:
+                    return
+                received = time.perf_counter()
+                received_count += 1
+                if ack_every and received_count % ack_every == 0:
+                    await ws.send(json.dumps({"ack": received_count}))
+                if isinstance(message, bytes):
+                    self.waveform_frames += measure
+                    continue
+                data = json.loads(message)
+                if "gesture" not in data or not measure:
+                    continue
+                self.gestures += 1
+                input_end = data.get("input_end")
+                if input_end is None:
+                    continue
+                k = bisect.bisect_left(self.sent_end, input_end)  # batch carrying sample input_end - 1
+                if k < len(self.sent_time):
+                    self.latencies.append((received, (received - self.sent_time[k]) * 1000))
+
+
+def wait_for_port(host, port, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+async def run(args, pids):
+    parsed = urlparse(args.url)
+    base_url = f"{parsed.scheme}://{parsed.netloc}/ws/gesture/"
+    view_url = f"{base_url}view/"
+    if args.synthetic:
+        sources = [synthetic_samples(args.rate * 60, args.rate, seed=i) for i in range(args.clients)]
+    else:
+        recording = load_recordings(args.csv)
+        print(f"replaying {len(recording)} samples from {args.csv}")
+        sources = [recording] * args.clients
+
+    gloves = [Glove(i, sources[i], args) for i in range(args.clients)]
+    monitor = ProcessMonitor(pids) if pids else None
+    monitor_task = asyncio.create_task(monitor.run()) if monitor else None
+    measure_from = time.perf_counter() + args.warmup
+    deadline = measure_from + args.seconds
+    tasks = []
+    for glove in gloves:
+        for v in range(args.viewers):
+            tasks.append(glove.view(view_url, deadline + 1.0, measure=v == 0))
+        tasks.append(glove.produce(base_url, deadline))
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    if monitor_task:
+        monitor_task.cancel()
+    errors = [r for r in results if isinstance(r, Exception)]
+    for error in errors[:3]:
+        print(f"[WARNING] client failed: {error!r}")
+
+    warm = [ms for g in gloves for received, ms in g.latencies if received >= measure_from]
+    sent = sum(g.sent_end[-1] if g.sent_end else 0 for g in gloves)
+    elapsed = args.warmup + args.seconds
+    print(f"clients {args.clients} (x{args.viewers} viewers), {elapsed:.0f} s, "
+          f"{sent / elapsed / args.clients:.0f} samples/s per glove (target {args.rate}), "
+          f"late batches {sum(g.late_batches for g in gloves)}, failed connections {len(errors)}")
+    print(f"gesture messages {sum(g.gestures for g in gloves)}, waveform frames {sum(g.waveform_frames for g in gloves)}")
+    if warm:
+        p50, p95, p99 = np.percentile(warm, [50, 95, 99])
+        print(f"last sample -> gesture message: p50 {p50:.1f} ms  p95 {p95:.1f} ms  p99 {p99:.1f} ms  (n={len(warm)})")
+    else:
+        print("no gesture messages received (model not loaded, or the motion gate never opened)")
+    if monitor and monitor.cpu_percent:
+        cpu = np.asarray(monitor.cpu_percent)
+        print(f"server CPU mean {cpu.mean():.0f}% peak {cpu.max():.0f}% (100% = one core), "
+              f"RSS max {max(monitor.rss_mb):.0f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="ws://localhost:8000/ws/gesture/")
+    parser.add_argument("--clients", type=int, default=4, help="simulated gloves")
+    parser.add_argument("--viewers", type=int, default=1, help="viewer connections per glove")
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--warmup", type=float, default=10.0, help="seconds excluded from the latency percentiles")
+    parser.add_argument("--rate", type=int, default=1000, help="samples per second per glove")
+    parser.add_argument("--batch", type=int, default=25, help="samples per binary message")
+    parser.add_argument("--ack-every", type=int, default=4,
+                        help="viewer messages per acknowledgement (below OUTBOUND_WINDOW; 0: never acknowledge)")
+    parser.add_argument("--csv", default="new_collect/*/sensor_data*.csv", help="recordings to replay")
+    parser.add_argument("--synthetic", action="store_true", help="random samples instead of recordings")
+    parser.add_argument("--server-pid", type=int, nargs="+", default=[], help="server processes to monitor")
+    parser.add_argument("--spawn", action="store_true", help="start daphne for the run and monitor it")
+    args = parser.parse_args()
+
+    parsed = urlparse(args.url)
+    if parsed.hostname not in LOCAL_HOSTS:
+        sys.exit(f"refusing to load {parsed.hostname}: this benchmark only targets localhost")
+
+    server = None
+    pids = list(args.server_pid)
+    if args.spawn:
+        port = parsed.port or 8000
+        server = subprocess.Popen(["daphne", "-b", "127.0.0.1", "-p", str(port), "gesture_backend.asgi:application"],
+                                  cwd=BACKEND_DIR)
+        if not wait_for_port("127.0.0.1", port, 30):
+            server.terminate()
+            sys.exit("daphne did not start listening within 30 s")
+        pids.append(server.pid)
+    try:
+        asyncio.run(run(args, pids))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
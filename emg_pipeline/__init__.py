@@ -0,0 +1,91 @@
+"""
+Shared streaming utilities for the EMG + IMU gesture pipeline.
+
+Used by the host-side scripts (`inference.py`, `new_data_collection.py`),
+`inference/arduino_reader.py` and the Django Channels backend.
+"""
+from .ring_buffer import RingBuffer
+from .serial_decoder import LineDecoder, make_decoder, read_chunk, spread_timestamps
+from .framing import ByteStreamPort, FrameDecoder, encode_frames
+from .ws_protocol import SequenceTracker, pack_batch, unpack_batch
+from .waveform import WaveformStream, decimation_factor, minmax_decimate, pack_waveform, unpack_waveform
+from .windowing import count_windows, sliding_windows, to_model_input
+from .streaming import StreamingFeatureCache
+from .scheduling import LatestQueue
+from .gating import MotionGate
+from .predictor import BACKENDS, CompiledPredictor, load_predictor
+from .streaming_rnn import StreamingRecurrentPredictor, build_streaming_model
+from .tflite import QUANTIZE_MODES, TFLitePredictor, export_tflite
+from .datasets import load_gesture_sets, prepare_model_inputs
+from .worker_pool import WorkerPool, auto_affinity
+from .cascade import CascadePredictor, ClassifierPredictor, cache_features, load_cascade, window_features
+from .ensemble import FUSIONS, EnsemblePredictor
+from .registry import MODEL_STATES, ModelRegistry, default_loader, file_size
+from .features import (
+    FEATURE_NAMES,
+    NoiseSource,
+    default_noise,
+    extract_emg_features,
+    extract_emg_features_batch,
+    replace_emg_with_synthetic_data,
+    sine_basis,
+    synthesize_time_series,
+    synthesize_time_series_batch,
+)
+
+__all__ = [
+    "RingBuffer",
+    "LineDecoder",
+    "make_decoder",
+    "read_chunk",
+    "spread_timestamps",
+    "FrameDecoder",
+    "encode_frames",
+    "ByteStreamPort",
+    "pack_batch",
+    "unpack_batch",
+    "SequenceTracker",
+    "WaveformStream",
+    "decimation_factor",
+    "minmax_decimate",
+    "pack_waveform",
+    "unpack_waveform",
+    "count_windows",
+    "sliding_windows",
+    "to_model_input",
+    "FEATURE_NAMES",
+    "extract_emg_features",
+    "extract_emg_features_batch",
+    "synthesize_time_series",
+    "synthesize_time_series_batch",
+    "sine_basis",
+    "NoiseSource",
+    "default_noise",
+    "replace_emg_with_synthetic_data",
+    "StreamingFeatureCache",
+    "LatestQueue",
+    "MotionGate",
+    "CompiledPredictor",
+    "BACKENDS",
+    "load_predictor",
+    "StreamingRecurrentPredictor",
+    "build_streaming_model",
+    "TFLitePredictor",
+    "export_tflite",
+    "QUANTIZE_MODES",
+    "load_gesture_sets",
+    "prepare_model_inputs",
+    "WorkerPool",
+    "auto_affinity",
+    "CascadePredictor",
+    "ClassifierPredictor",
+    "EnsemblePredictor",
+    "FUSIONS",
+    "cache_features",
+    "load_cascade",
+    "window_features",
+    "ModelRegistry",
+    "MODEL_STATES",
+    "default_loader",
+    "file_size",
+]
@@ -0,0 +1,153 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from .features import extract_emg_features_batch
+
+CRITERIA = ("probability", "margin")
+STAGES = ("fast", "deep")
+
+
+def window_features(windows, emg_features=None, fs=1000):
+    """
+    Flat feature vector for the first cascade stage: the 7 `FEATURE_NAMES`
+    features of every window and channel, computed on the raw signal.
+
+    Parameters:
+    - windows: Windows of shape (..., num_windows, num_timesteps, num_channels)
+    - emg_features: Features already extracted from the raw first R channels,
+      shape (..., num_windows, R, 7) (e.g. `StreamingFeatureCache.features()`);
+      those channels of `windows` are then ignored and only the rest is extracted
+    - fs: Sampling frequency
+
+    Returns:
+    - Shape (..., num_windows * num_channels * 7), float32
+    """
+    windows = np.asarray(windows)
+    if emg_features is None:
+        features = extract_emg_features_batch(windows, fs)
+    else:
+        num_done = np.shape(emg_features)[-2]
+        rest = extract_emg_features_batch(windows[..., num_done:], fs)
+        features = np.concatenate([emg_features, rest], axis=-2)
+    return features.reshape(features.shape[:-3] + (-1,)).astype(np.float32)
+
+
+def cache_features(cache):
+    """
+    (1, D) first-stage input for the windows of a `StreamingFeatureCache`.
+    Its EMG channels already hold synthetic series, so the raw-signal EMG
+    features it cached are reused and only the IMU channels are extracted.
+    """
+    return window_features(cache.windows(), cache.features(), cache.fs)[np.newaxis]
+
+
+class ClassifierPredictor:
+    """
+    (1, num_classes) predictor around a fitted scikit-learn classifier with
+    `predict_proba` (e.g. the SVM / KNN saved by train_cascade.py), in the deep models'
+    output layout, so it can stand in for or sit next to a deep model.
+    """
+
+    def __init__(self, classifier, num_classes=None):
+        self.classifier = classifier
+        self.classes = np.asarray(classifier.classes_, dtype=np.int64)
+        self.num_classes = num_classes or int(self.classes.max()) + 1
+
+    def __call__(self, features):
+        probabilities = self.classifier.predict_proba(np.reshape(features, (1, -1)))
+        output = np.zeros((1, self.num_classes), dtype=np.float32)
+        output[0, self.classes] = probabilities[0]
+        return output
+
+
+class CascadePredictor:
+    """
+    Two-stage classifier: a small feature-based model (the KNN / RBF-SVM of
+    `models_KNN_SVM.ipynb`, on `window_features`) answers first, and the
+    deep model runs only when the first stage is unsure. Confident gestures
+    cost a feature vector and a classical prediction instead of a CNN pass.
+
+    The first stage must be trained on the deep model's label encoding
+    (class i = output column i) and support `predict_proba`. It is unsure when
+    its top probability ("probability") or the gap between its two highest
+    probabilities ("margin") is below `threshold`.
+
+    Parameters:
+    - classifier: Fitted scikit-learn estimator / pipeline with `predict_proba`
+    - deep: Deep predictor, (1, W, F) -> (1, num_classes)
+    - threshold: Confidence below which the deep model is called
+    - criterion: "probability" or "margin"
+    - num_classes: Deep model output size (defaults to the classifier's classes)
+    - window: Latencies kept per stage for the percentiles in `stats`
+    """
+
+    def __init__(self, classifier, deep, threshold=0.8, criterion="probability",
+                 num_classes=None, window=1000):
+        if criterion not in CRITERIA:
+            raise ValueError(f"criterion must be one of {CRITERIA}, got {criterion!r}")
+        self.classifier = classifier
+        self.fast = ClassifierPredictor(classifier, num_classes)
+        self.deep = deep
+        self.threshold = threshold
+        self.criterion = criterion
+        self.counts = dict.fromkeys(STAGES, 0)
+        self._latencies = {stage: deque(maxlen=window) for stage in STAGES}
+        self._lock = threading.Lock()
+
+    def confidence(self, probabilities):
+        top = np.sort(probabilities, axis=-1)[..., ::-1]
+        if self.criterion == "margin":
+            return top[..., 0] - (top[..., 1] if top.shape[-1] > 1 else 0.0)
+        return top[..., 0]
+
+    def __call__(self, features, model_input):
+        """
+        Returns ((1, num_classes) probabilities, stage) for one sample.
+        `model_input` may be a callable returning the deep model input, so
+        it is only built when the deep model runs.
+        """
+        start = time.perf_counter()
+        output = self.fast(features)
+        fast_ms = (time.perf_counter() - start) * 1000
+        if self.confidence(output[0]) >= self.threshold:
+            self._record("fast", fast_ms)
+            return output, "fast"
+
+        start = time.perf_counter()
+        output = self.deep(model_input() if callable(model_input) else model_input)
+        self._record("deep", fast_ms + (time.perf_counter() - start) * 1000)
+        return output, "deep"
+
+    def predict(self, features, model_input, verbose=0):
+        return self(features, model_input)[0]
+
+    def _record(self, stage, latency_ms):
+        with self._lock:
+            self.counts[stage] += 1
+            self._latencies[stage].append(latency_ms)
+
+    def stats(self):
+        """Share of answers and latency (mean / p50 / p95 ms, first stage included) per stage."""
+        with self._lock:
+            total = sum(self.counts.values())
+            result = {"total": total}
+            for stage in STAGES:
+                latencies = np.asarray(self._latencies[stage])
+                result[stage] = {
+                    "count": self.counts[stage],
+                    "share": self.counts[stage] / total if total else 0.0,
+                    "mean_ms": float(latencies.mean()) if len(latencies) else None,
+                    "p50_ms": float(np.percentile(latencies, 50)) if len(latencies) else None,
+                    "p95_ms": float(np.percentile(latencies, 95)) if len(latencies) else None,
+                }
+        return result
+
+
+def load_cascade(classifier_path, deep, threshold=0.8, criterion="probability"):
+    """`CascadePredictor` around a first stage saved by train_cascade.py (joblib)."""
+    import joblib
+
+    return CascadePredictor(joblib.load(classifier_path), deep, threshold, criterion)
@@ -0,0 +1,46 @@
+import os
+
+import numpy as np
+
+from .features import replace_emg_with_synthetic_data
+from .windowing import to_model_input
+
+
+def load_gesture_sets(root_path):
+    """
+    Loads and concatenates every `processed_gesture_data.npy` /
+    `gesture_labels.npy` pair under `root_path` (one subfolder per subject,
+    as written by Visualization_eda.ipynb; `root_path` itself may hold a pair).
+
+    Returns:
+    - X: Shape (num_samples, num_windows, num_timesteps, num_channels)
+    - y: Shape (num_samples,) raw gesture labels
+    """
+    folders = [root_path] + sorted(
+        os.path.join(root_path, name) for name in os.listdir(root_path)
+        if os.path.isdir(os.path.join(root_path, name)))
+    X_list, y_list = [], []
+    for folder in folders:
+        data_path = os.path.join(folder, "processed_gesture_data.npy")
+        label_path = os.path.join(folder, "gesture_labels.npy")
+        if os.path.exists(data_path) and os.path.exists(label_path):
+            X_list.append(np.load(data_path, allow_pickle=True))
+            y_list.append(np.load(label_path, allow_pickle=True))
+    if not X_list:
+        raise FileNotFoundError(f"no processed_gesture_data.npy / gesture_labels.npy under {root_path}")
+    return np.concatenate(X_list, axis=0), np.concatenate(y_list, axis=0)
+
+
+def prepare_model_inputs(X, num_replaced=4, fs=1000, noise=None):
+    """
+    Applies the training-time preprocessing to a (N, W, T, C) set: NaNs to 0,
+    the first `num_replaced` channels replaced by synthetic series (0 keeps
+    the raw data), and flattening to the (N, W, T * C) float32 model layout.
+    """
+    X = np.nan_to_num(np.asarray(X, dtype=np.float64), nan=0.0)
+    if num_replaced:
+        X = replace_emg_with_synthetic_data(X, fs=fs, num_channels=num_replaced, noise=noise)
+    out = np.empty((len(X), X.shape[1], X.shape[2] * X.shape[3]), dtype=np.float32)
+    for i, sample in enumerate(X):
+        to_model_input(sample, out[i:i + 1])
+    return out
@@ -0,0 +1,142 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import numpy as np
+
+FUSIONS = ("mean", "vote")
+MEMBER_INPUTS = ("model", "features")
+
+
+class EnsemblePredictor:
+    """
+    Runs several models concurrently on the same tick and fuses their class
+    probabilities, so a tick costs roughly the slowest member instead of
+    the sum of all of them.
+
+    Each member is (name, predictor, weight, input): deep models take the
+    (1, W, F) model input ("model"), classical ones the `window_features`
+    vector ("features"). Members answering after `deadline_ms` are left out
+    of the fusion for that tick; a member still busy with an earlier tick is
+    not called again until it finishes, so one slow model cannot build a
+    backlog. Deep members loaded as `WorkerPool`s run in their own processes.
+
+    Parameters:
+    - members: List of (name, predictor, weight, input) tuples
+    - fusion: "mean" (weighted average of probabilities) or "vote" (weighted argmax votes)
+    - deadline_ms: Per-tick budget for the members (None: wait for all)
+    - window: Latencies kept per member for the percentiles in `stats`
+    """
+
+    def __init__(self, members, fusion="mean", deadline_ms=None, window=1000):
+        if fusion not in FUSIONS:
+            raise ValueError(f"fusion must be one of {FUSIONS}, got {fusion!r}")
+        for name, _, _, kind in members:
+            if kind not in MEMBER_INPUTS:
+                raise ValueError(f"member {name!r}: input must be one of {MEMBER_INPUTS}, got {kind!r}")
+        self.members = list(members)
+        self.fusion = fusion
+        self.deadline_ms = deadline_ms
+        self._executor = ThreadPoolExecutor(len(self.members), thread_name_prefix="ensemble")
+        self._running = {}  # name -> Future of the member's last call
+        self._lock = threading.Lock()
+        self.ticks = 0
+        self.empty = 0  # ticks where no member answered in time
+        self._stats = {
+            name: {"used": 0, "late": 0, "busy": 0, "errors": 0, "agree": 0,
+                   "latencies": deque(maxlen=window)}
+            for name, *_ in self.members
+        }
+
+    def _timed(self, name, predictor, x):
+        start = time.perf_counter()
+        output = predictor(x)
+        with self._lock:
+            self._stats[name]["latencies"].append((time.perf_counter() - start) * 1000)
+        return output
+
+    def __call__(self, features, model_input):
+        """
+        Returns the fused (1, num_classes) output for one tick, or None if
+        no member answered before the deadline.
+        """
+        start = time.perf_counter()
+        submitted = {}
+        for name, predictor, weight, kind in self.members:
+            running = self._running.get(name)
+            if running is not None and not running.done():
+                self._stats[name]["busy"] += 1
+                continue
+            x = features if kind == "features" else model_input
+            future = self._executor.submit(self._timed, name, predictor, x)
+            self._running[name] = future
+            submitted[future] = (name, weight)
+
+        timeout = None
+        if self.deadline_ms is not None:
+            timeout = max(self.deadline_ms / 1000 - (time.perf_counter() - start), 0)
+        done, late = wait(submitted, timeout)
+        for future in late:
+            self._stats[submitted[future][0]]["late"] += 1
+
+        outputs = []
+        for future in done:
+            name, weight = submitted[future]
+            try:
+                outputs.append((name, weight, np.asarray(future.result()).reshape(1, -1)))
+            except Exception as e:
+                self._stats[name]["errors"] += 1
+                if self._stats[name]["errors"] == 1:  # later failures only show up in stats()
+                    print(f"[WARNING] ensemble member {name} failed: {e!r}")
+        self.ticks += 1
+        if not outputs:
+            self.empty += 1
+            return None
+
+        fused = self.fuse(outputs)
+        label = int(np.argmax(fused))
+        for name, _, output in outputs:
+            self._stats[name]["used"] += 1
+            self._stats[name]["agree"] += int(np.argmax(output) == label)
+        return fused
+
+    def fuse(self, outputs):
+        """Fuses [(name, weight, (1, num_classes) output)] into one (1, num_classes) output."""
+        num_classes = max(output.shape[1] for _, _, output in outputs)
+        fused = np.zeros((1, num_classes), dtype=np.float64)
+        total = 0.0
+        for _, weight, output in outputs:
+            if self.fusion == "vote":
+                fused[0, int(np.argmax(output))] += weight
+            else:
+                fused[0, :output.shape[1]] += weight * output[0]
+            total += weight
+        return (fused / total).astype(np.float32) if total else fused.astype(np.float32)
+
+    def predict(self, features, model_input, verbose=0):
+        return self(features, model_input)
+
+    def stats(self):
+        """Per member: share of ticks used, late / busy / error counts, agreement with the fused label, latency."""
+        with self._lock:
+            result = {"ticks": self.ticks, "empty": self.empty, "members": {}}
+            for name, s in self._stats.items():
+                latencies = np.asarray(s["latencies"])
+                result["members"][name] = {
+                    "used": s["used"],
+                    "share": s["used"] / self.ticks if self.ticks else 0.0,
+                    "late": s["late"],
+                    "busy": s["busy"],
+                    "errors": s["errors"],
+                    "agreement": s["agree"] / s["used"] if s["used"] else None,
+                    "mean_ms": float(latencies.mean()) if len(latencies) else None,
+                    "p95_ms": float(np.percentile(latencies, 95)) if len(latencies) else None,
+                }
+        return result
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        for _, predictor, _, _ in self.members:
+            if hasattr(predictor, "close"):
+                predictor.close()
@@ -0,0 +1,132 @@
+"""
+Fixed-size little-endian binary frames for the board -> host serial link.
+
+Frame layout (26 bytes, matches `SensorFrame` in final_collect.ino):
+
+    uint16 sync       0xA55A, used to find frame boundaries
+    uint16 seq        increments by one per sample, wraps at 65536
+    int16  ch[10]     EMG1-4, AccX/Y/Z, GyroX/Y/Z
+    uint16 checksum   (seq + sum(ch as uint16)) & 0xFFFF
+"""
+import numpy as np
+
+FRAME_SYNC = 0xA55A
+SYNC_BYTES = FRAME_SYNC.to_bytes(2, "little")
+NUM_FRAME_CHANNELS = 10
+
+
+def frame_dtype(num_channels=NUM_FRAME_CHANNELS):
+    return np.dtype([
+        ("sync", "<u2"),
+        ("seq", "<u2"),
+        ("channels", "<i2", (num_channels,)),
+        ("checksum", "<u2"),
+    ])
+
+
+def _checksum(seq, channels):
+    words = channels.astype("<i2", copy=False).view("<u2")
+    return ((seq.astype(np.uint32) + words.sum(axis=-1, dtype=np.uint32)) & 0xFFFF).astype(np.uint16)
+
+
+def encode_frames(samples, start_seq=0):
+    """Packs an (N, C) array of samples into N binary frames (what the board sends)."""
+    samples = np.asarray(samples)
+    frames = np.zeros(len(samples), dtype=frame_dtype(samples.shape[1]))
+    frames["sync"] = FRAME_SYNC
+    frames["seq"] = (start_seq + np.arange(len(samples))) & 0xFFFF
+    frames["channels"] = samples
+    frames["checksum"] = _checksum(frames["seq"], frames["channels"])
+    return frames.tobytes()
+
+
+class FrameDecoder:
+    """
+    Decodes a raw byte stream of binary frames in bulk.
+
+    `feed()` has the same contract as `LineDecoder.feed()`: it returns an
+    (N, num_channels) array for every complete frame and keeps a trailing
+    partial frame for the next call. Runs of aligned frames are decoded
+    with a single `np.frombuffer`; after corruption the decoder skips to
+    the next sync word. Gaps in the sequence counter are counted in
+    `dropped`, frames failing the checksum in `malformed`.
+    """
+
+    def __init__(self, num_channels=NUM_FRAME_CHANNELS):
+        self.num_channels = num_channels
+        self.dtype = frame_dtype(num_channels)
+        self.frame_size = self.dtype.itemsize
+        self.decoded = 0  # frames returned so far
+        self.dropped = 0  # frames missing according to the sequence counter
+        self.malformed = 0  # frames with a sync word but a bad checksum
+        self.resyncs = 0  # times the decoder had to search for a sync word
+        self.skipped_bytes = 0
+        self.last_seq = None
+        self._pending = b""
+
+    def feed(self, data):
+        buf = self._pending + data if self._pending else bytes(data)
+        size = self.frame_size
+        runs = []
+        pos = 0
+        while len(buf) - pos >= size:
+            frames = np.frombuffer(buf, dtype=self.dtype, count=(len(buf) - pos) // size, offset=pos)
+            ok = frames["sync"] == FRAME_SYNC
+            ok &= frames["checksum"] == _checksum(frames["seq"], frames["channels"])
+            run = len(ok) if ok.all() else int(np.argmin(ok))
+            if run:
+                runs.append(frames[:run])
+                pos += run * size
+                continue
+            # frame at `pos` is bad: count it if it looked like a frame, then resync
+            if frames["sync"][0] == FRAME_SYNC:
+                self.malformed += 1
+            self.resyncs += 1
+            nxt = buf.find(SYNC_BYTES, pos + 1)
+            if nxt < 0:
+                # keep a trailing byte that may be the first half of a sync word
+                nxt = max(pos + 1, len(buf) - 1)
+            self.skipped_bytes += nxt - pos
+            pos = nxt
+        self._pending = buf[pos:]
+
+        if not runs:
+            return np.empty((0, self.num_channels), dtype=np.int16)
+        frames = np.concatenate(runs) if len(runs) > 1 else runs[0]
+        self._count_gaps(frames["seq"])
+        self.decoded += len(frames)
+        return frames["channels"].astype(np.int16)
+
+    def _count_gaps(self, seq):
+        seq = seq.astype(np.int64)
+        if self.last_seq is not None:
+            seq = np.concatenate(([self.last_seq], seq))
+        steps = np.diff(seq) % 65536
+        # a step of 0 is a repeated frame, anything above 1 means frames were lost
+        self.dropped += int(np.sum(steps[steps > 1] - 1))
+        self.last_seq = int(seq[-1])
+
+
+class ByteStreamPort:
+    """
+    Stand-in for `serial.Serial` that replays a fixed byte string, for
+    exercising the decoders without a board attached. Each `read()` returns
+    at most `chunk_size` bytes, like a driver delivering data in pieces.
+    """
+
+    def __init__(self, data, chunk_size=512):
+        self._data = bytes(data)
+        self._pos = 0
+        self.chunk_size = chunk_size
+
+    @property
+    def in_waiting(self):
+        return min(len(self._data) - self._pos, self.chunk_size)
+
+    def read(self, size=1):
+        chunk = self._data[self._pos:self._pos + min(size, self.chunk_size)]
+        self._pos += len(chunk)
+        return chunk
+
+    def close(self):
+        self._pos = len(self._data)
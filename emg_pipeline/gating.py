@@ -0,0 +1,68 @@
+import numpy as np
+
+
+class MotionGate:
+    """
+    Streaming onset / offset detector on the gyro channels.
+
+    Fed the raw samples as they arrive, it keeps only the running maximum of
+    each chunk, so the decision whether a gesture is in progress costs O(1)
+    per sample and is available before any windowing, feature or model work.
+
+    A chunk whose maximum over `channels` exceeds `onset_threshold` starts a
+    gesture. While active, any sample above `offset_threshold` extends it,
+    and the gate closes once `hold_samples` samples have passed without one.
+    `delay_samples` postpones opening after the onset, so the model only runs
+    once the gesture has moved into its input span.
+
+    Parameters:
+    - channels: Gyro channel indices (8 and 9 of the 4 EMG + 6 IMU layout)
+    - onset_threshold: Raw value that starts a gesture
+    - offset_threshold: Raw value that keeps it going (defaults to `onset_threshold`)
+    - hold_samples: Quiet samples after the last hot one before the gate closes
+    - delay_samples: Samples after the onset before the gate opens
+    """
+
+    def __init__(self, channels=(8, 9), onset_threshold=5000, offset_threshold=None,
+                 hold_samples=1000, delay_samples=0):
+        self.channels = list(channels)
+        self.onset_threshold = onset_threshold
+        self.offset_threshold = onset_threshold if offset_threshold is None else offset_threshold
+        self.hold_samples = hold_samples
+        self.delay_samples = delay_samples
+        self.onsets = 0  # gestures detected
+        self.reset()
+
+    def reset(self):
+        self.total = 0  # samples seen
+        self.active = False
+        self.onset_sample = None  # absolute index of the current gesture's first hot sample
+        self.last_hot_sample = None
+        self.peak = 0  # running maximum of the current gesture
+
+    def update(self, samples):
+        """Feeds a (k, num_channels) block (or a single sample); returns `is_open`."""
+        samples = np.asarray(samples)
+        if samples.ndim == 1:
+            samples = samples[np.newaxis]
+        if len(samples):
+            level = samples[:, self.channels].max(axis=1)
+            threshold = self.offset_threshold if self.active else self.onset_threshold
+            hot = np.flatnonzero(level > threshold)
+            if len(hot):
+                if not self.active:
+                    self.active = True
+                    self.onset_sample = self.total + int(hot[0])
+                    self.peak = 0
+                    self.onsets += 1
+                self.last_hot_sample = self.total + int(hot[-1])
+                self.peak = max(self.peak, int(level[hot].max()))
+            self.total += len(samples)
+        if self.active and self.total - 1 - self.last_hot_sample >= self.hold_samples:
+            self.active = False
+        return self.is_open
+
+    @property
+    def is_open(self):
+        """True while a gesture is in progress and `delay_samples` have passed since onset."""
+        return self.active and self.total - self.onset_sample >= self.delay_samples
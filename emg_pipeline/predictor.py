@@ -0,0 +1,87 @@
+import os
+import threading
+
+import numpy as np
+
+
+class CompiledPredictor:
+    """
+    Single-sample forward pass for the trained Keras models without the
+    per-call overhead of `model.predict`.
+
+    The forward pass is traced once as a `tf.function` for the fixed input
+    signature (1, num_windows, features), warmed up at construction, and
+    every call copies the input into a preallocated float32 buffer (one per
+    calling thread, so one instance can serve a thread pool concurrently).
+    TensorFlow is imported lazily so the rest of `emg_pipeline` stays
+    usable without it.
+
+    Parameters:
+    - model: A loaded Keras model, or a path to a `.h5` file
+    - input_shape: Per-sample input shape, e.g. (19, 1000) (defaults to the model's)
+    - warmup: Forward passes run at construction
+    """
+
+    def __init__(self, model, input_shape=None, warmup=3):
+        import tensorflow as tf
+
+        if isinstance(model, (str, os.PathLike)):
+            model = tf.keras.models.load_model(model, compile=False)
+        self.model = model
+        if input_shape is None:
+            input_shape = model.input_shape[1:]
+        self.input_shape = (1,) + tuple(input_shape)
+        self._local = threading.local()
+
+        @tf.function(input_signature=[tf.TensorSpec(self.input_shape, tf.float32)])
+        def forward(x):
+            return model(x, training=False)
+
+        forward.get_concrete_function()  # trace now rather than on the first call
+        self._forward = forward
+
+        # batched pass for any batch size, traced on its first call
+        @tf.function(input_signature=[tf.TensorSpec((None,) + self.input_shape[1:], tf.float32)])
+        def forward_batch(x):
+            return model(x, training=False)
+
+        self._forward_batch = forward_batch
+        self.calls = 0
+        for _ in range(warmup):
+            self(np.zeros(self.input_shape, dtype=np.float32))
+
+    def __call__(self, x):
+        """Returns the (1, num_classes) output for one (1, W, F) or (W, F) input."""
+        buf = getattr(self._local, "input", None)
+        if buf is None:
+            buf = self._local.input = np.zeros(self.input_shape, dtype=np.float32)
+        np.copyto(buf, np.reshape(x, self.input_shape), casting="unsafe")
+        self.calls += 1
+        return self._forward(buf).numpy()
+
+    def predict(self, x, verbose=0):
+        """Drop-in for `model.predict` on a single sample."""
+        return self(x)
+
+    def predict_batch(self, X):
+        """Returns the (N, num_classes) output for an (N, W, F) batch in one forward pass."""
+        self.calls += 1
+        return self._forward_batch(np.asarray(X, dtype=np.float32)).numpy()
+
+
+BACKENDS = ("keras", "tflite")
+
+
+def load_predictor(model_path, backend="keras", num_threads=None):
+    """
+    Loads `model_path` for single-sample inference on the given backend:
+    "keras" compiles a `.h5` model (`CompiledPredictor`), "tflite" runs an
+    exported `.tflite` file (`TFLitePredictor`, no TensorFlow needed when
+    `tflite_runtime` is installed).
+    """
+    if backend == "keras":
+        return CompiledPredictor(model_path)
+    if backend == "tflite":
+        from .tflite import TFLitePredictor
+        return TFLitePredictor(model_path, num_threads=num_threads)
+    raise ValueError(f"backend must be one of {BACKENDS}, got {backend!r}")
@@ -0,0 +1,216 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from .predictor import load_predictor
+
+# cold: registered, never loaded; warming: loading in the background;
+# ready: cached; failed: last load raised (see `status`)
+MODEL_STATES = ("cold", "warming", "ready", "failed")
+
+
+def default_loader(spec):
+    return load_predictor(spec["path"], spec.get("backend", "keras"))
+
+
+def file_size(model, spec):
+    """Default memory estimate: the size of the weights file (0 if it is missing)."""
+    try:
+        return os.path.getsize(spec["path"])
+    except OSError:
+        return 0
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of named models, loaded lazily in background threads.
+
+    `get(name)` never blocks: it returns the loaded predictor, or starts
+    loading it and returns None while the model is "warming", so callers can
+    keep serving (e.g. a status message) instead of stalling on a cold start
+    or a TensorFlow import.
+
+    With `max_models` / `max_bytes` the loaded models form an LRU cache:
+    after each load the least recently used unpinned models are evicted
+    (closed and reset to "cold") until both limits hold, so many registered
+    models (e.g. one per user) can share a bounded amount of memory. An
+    evicted model is reloaded in the background on its next `get`.
+
+    Parameters:
+    - loader: Callable taking a spec dict (`path`, `backend` and any extra
+      keys given to `register`) and returning a predictor
+    - max_models: Largest number of loaded models (None: unbounded)
+    - max_bytes: Largest total `sizer` estimate of the loaded models (None: unbounded)
+    - sizer: Callable (model, spec) -> bytes used for memory accounting
+    - on_evict: Called with (name, model) after a model is evicted or unloaded
+    """
+
+    def __init__(self, loader=default_loader, max_models=None, max_bytes=None, sizer=file_size,
+                 on_evict=None):
+        self._loader = loader
+        self.max_models = max_models
+        self.max_bytes = max_bytes
+        self._sizer = sizer
+        self._on_evict = on_evict
+        self._specs = {}
+        self._models = OrderedDict()  # least recently used first
+        self._bytes = {}
+        self._pinned = set()
+        self._states = {}
+        self._errors = {}
+        self._load_seconds = {}
+        self._loaded = {}  # name -> threading.Event, set when a load finishes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def register(self, name, path, backend="keras", pinned=False, **info):
+        """
+        Adds (or replaces, if not loaded) a model spec under `name`.
+        Pinned models are never evicted (e.g. a shared fallback model).
+        """
+        with self._lock:
+            self._specs[name] = dict(info, path=str(path), backend=backend)
+            self._states.setdefault(name, "cold")
+            self._loaded.setdefault(name, threading.Event())
+            if pinned:
+                self._pinned.add(name)
+
+    def __contains__(self, name):
+        return name in self._specs
+
+    def names(self):
+        return list(self._specs)
+
+    def spec(self, name):
+        return self._specs[name]
+
+    def state(self, name):
+        return self._states[name]
+
+    @property
+    def total_bytes(self):
+        return sum(self._bytes.values())
+
+    def get(self, name):
+        """The loaded predictor for `name`, or None while it is cold / warming / failed."""
+        with self._lock:
+            model = self._models.get(name)
+            if model is not None:
+                self._models.move_to_end(name)
+                self.hits += 1
+                return model
+            self.misses += 1
+        if self._states[name] == "cold":
+            self.load_async(name)
+        return None
+
+    def load_async(self, name):
+        """Starts loading `name` in a background thread unless it is loaded or loading."""
+        with self._lock:
+            if self._states[name] in ("warming", "ready"):
+                return
+            self._states[name] = "warming"
+            self._loaded[name].clear()
+        threading.Thread(target=self._load, args=(name,), daemon=True,
+                         name=f"model-load-{name}").start()
+
+    def load(self, name, timeout=None):
+        """Loads `name` (or waits for the running load) and returns the predictor."""
+        self.load_async(name)
+        if not self._loaded[name].wait(timeout):
+            raise TimeoutError(f"model {name!r} still loading after {timeout} s")
+        if self._states[name] == "failed":
+            raise RuntimeError(f"model {name!r} failed to load: {self._errors[name]}")
+        return self._models.get(name)
+
+    def _load(self, name):
+        start = time.perf_counter()
+        spec = self._specs[name]
+        evicted = []
+        try:
+            model = self._loader(spec)
+            size = self._sizer(model, spec)
+        except Exception as e:
+            with self._lock:
+                self._states[name] = "failed"
+                self._errors[name] = repr(e)
+        else:
+            with self._lock:
+                self._models[name] = model
+                self._bytes[name] = size
+                self._states[name] = "ready"
+                self._errors.pop(name, None)
+                self._load_seconds[name] = time.perf_counter() - start
+                self.loads += 1
+                evicted = self._evict_over_limit(keep=name)
+        finally:
+            self._loaded[name].set()
+        for victim, victim_model in evicted:
+            self._release(victim, victim_model)
+
+    def _over_limit(self):
+        return ((self.max_models is not None and len(self._models) > self.max_models)
+                or (self.max_bytes is not None and self.total_bytes > self.max_bytes))
+
+    def _evict_over_limit(self, keep):
+        """Pops LRU models (not pinned, not `keep`) until within limits; call with the lock held."""
+        evicted = []
+        candidates = [n for n in self._models if n != keep and n not in self._pinned]
+        while self._over_limit() and candidates:
+            victim = candidates.pop(0)
+            evicted.append((victim, self._models.pop(victim)))
+            self._bytes.pop(victim, None)
+            self._states[victim] = "cold"
+            self.evictions += 1
+        return evicted
+
+    def _release(self, name, model):
+        if self._on_evict is not None:
+            self._on_evict(name, model)
+        if hasattr(model, "close"):
+            model.close()
+
+    def unload(self, name):
+        """Drops the cached predictor (closing it if it has `close`); the next `get` reloads it."""
+        with self._lock:
+            model = self._models.pop(name, None)
+            self._bytes.pop(name, None)
+            if self._states[name] == "ready":
+                self._states[name] = "cold"
+        if model is not None:
+            self._release(name, model)
+        return model
+
+    def stats(self):
+        """Cache counters: loaded models / bytes, hits, misses, loads, evictions."""
+        lookups = self.hits + self.misses
+        return {
+            "loaded": list(self._models),
+            "bytes": self.total_bytes,
+            "max_models": self.max_models,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "loads": self.loads,
+            "evictions": self.evictions,
+        }
+
+    def status(self):
+        """Health-check view: {name: {state, path, backend, bytes, load_seconds, error}}."""
+        return {
+            name: {
+                "state": self._states[name],
+                "path": spec["path"],
+                "backend": spec["backend"],
+                "pinned": name in self._pinned,
+                "bytes": self._bytes.get(name),
+                "load_seconds": self._load_seconds.get(name),
+                "error": self._errors.get(name),
+            }
+            for name, spec in self._specs.items()
+        }
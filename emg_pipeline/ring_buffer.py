@@ -0,0 +1,128 @@
+import threading
+import time
+
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Fixed-capacity sample store backed by one contiguous NumPy array.
+
+    Every sample is written twice, at `pos` and `pos + capacity`, so the most
+    recent `n <= capacity` samples always form a contiguous slice and
+    `latest(n)` can return a view without any per-element Python work.
+
+    Parameters:
+    - capacity: Maximum number of samples kept (older samples are overwritten)
+    - num_channels: Values per sample (4 EMG + 6 IMU by default)
+    - dtype: Storage dtype, int16 matches the raw sensor range
+    """
+
+    def __init__(self, capacity, num_channels=10, dtype=np.int16):
+        self.capacity = int(capacity)
+        self.num_channels = int(num_channels)
+        self._data = np.zeros((2 * self.capacity, self.num_channels), dtype=dtype)
+        self._head = 0  # next write position in [0, capacity)
+        self.total = 0  # samples ever written, i.e. absolute index of the next sample
+        self.last_append_time = None  # time.perf_counter() of the latest append
+        self._lock = threading.Lock()
+        self._appended = threading.Condition(self._lock)
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    @property
+    def dtype(self):
+        return self._data.dtype
+
+    @property
+    def nbytes(self):
+        """Memory held by the (mirrored) storage."""
+        return self._data.nbytes
+
+    def append(self, sample):
+        """Append one sample (sequence of `num_channels` values)."""
+        with self._lock:
+            h = self._head
+            self._data[h] = sample
+            self._data[h + self.capacity] = self._data[h]
+            self._head = (h + 1) % self.capacity
+            self.total += 1
+            self.last_append_time = time.perf_counter()
+            self._appended.notify_all()
+
+    def extend(self, samples):
+        """Append a (k, num_channels) block of samples in one vectorized write."""
+        samples = np.asarray(samples)
+        k = len(samples)
+        if k == 0:
+            return
+        cap = self.capacity
+        with self._lock:
+            h = self._head
+            self.total += k
+            if k >= cap:
+                # only the newest `capacity` samples survive; keep their slots aligned
+                h = (h + k - cap) % cap
+                samples = samples[-cap:]
+                k = cap
+            first = min(k, cap - h)
+            self._data[h:h + first] = samples[:first]
+            self._data[h + cap:h + cap + first] = samples[:first]
+            rest = k - first
+            if rest:
+                self._data[:rest] = samples[first:]
+                self._data[cap:cap + rest] = samples[first:]
+            self._head = (h + k) % cap
+            self.last_append_time = time.perf_counter()
+            self._appended.notify_all()
+
+    def wait_for(self, total, timeout=None):
+        """
+        Blocks until at least `total` samples have ever been written (see
+        `total`). Returns False if `timeout` seconds pass first.
+        """
+        with self._appended:
+            return self._appended.wait_for(lambda: self.total >= total, timeout)
+
+    def latest(self, n, copy=False, dtype=None):
+        """
+        Returns the newest `n` samples as an (n, num_channels) array, oldest first.
+
+        The default is a view into the buffer that later appends will overwrite;
+        pass `copy=True` (or a `dtype` to convert to) when the result is read
+        from another thread or kept across appends.
+        """
+        if n > len(self):
+            raise ValueError(f"requested {n} samples, only {len(self)} buffered")
+        with self._lock:
+            end = self._head + self.capacity
+            view = self._data[end - n:end]
+            if dtype is not None:
+                return view.astype(dtype)
+            return view.copy() if copy else view
+
+    def span(self, start, stop, copy=False, dtype=None):
+        """
+        Returns the samples with absolute indices [start, stop), where sample i
+        is the i-th sample ever written (see `total`).
+
+        Raises ValueError if part of the range was already overwritten or has
+        not arrived yet. `copy` and `dtype` behave as in `latest`.
+        """
+        with self._lock:
+            oldest = self.total - min(self.total, self.capacity)
+            if start < oldest or stop > self.total or start > stop:
+                raise ValueError(
+                    f"samples [{start}, {stop}) not buffered, have [{oldest}, {self.total})")
+            end = self._head + self.capacity - (self.total - stop)
+            view = self._data[end - (stop - start):end]
+            if dtype is not None:
+                return view.astype(dtype)
+            return view.copy() if copy else view
+
+    def clear(self):
+        with self._lock:
+            self._head = 0
+            self.total = 0
+            self.last_append_time = None
@@ -0,0 +1,37 @@
+import threading
+
+
+class LatestQueue:
+    """
+    Single-slot handoff between a producer and a consumer thread.
+
+    `put` never blocks: an item the consumer has not taken yet is replaced,
+    so a slow consumer always gets the newest input instead of working
+    through a backlog of stale ones. `coalesced` counts replaced items.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+        self._has_item = False
+        self.put_count = 0
+        self.coalesced = 0
+
+    def put(self, item):
+        with self._cond:
+            if self._has_item:
+                self.coalesced += 1
+            self._item = item
+            self._has_item = True
+            self.put_count += 1
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Waits for the next item; returns None if `timeout` seconds pass first."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._has_item, timeout):
+                return None
+            item = self._item
+            self._item = None
+            self._has_item = False
+            return item
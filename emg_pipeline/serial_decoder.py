@@ -0,0 +1,124 @@
+import itertools
+
+import numpy as np
+
+from .framing import FrameDecoder
+
+# bytes.split() treats these as separators: \t \n \v \f \r and space
+_WHITESPACE = np.zeros(256, dtype=bool)
+_WHITESPACE[[9, 10, 11, 12, 13, 32]] = True
+_DIGIT = np.zeros(256, dtype=bool)
+_DIGIT[48:58] = True
+_MINUS = 45
+
+
+class LineDecoder:
+    """
+    Decodes the whitespace-separated ASCII stream printed by the Arduino
+    sketch ("emg1 emg2 emg3 emg4 ax ay az gx gy gz\\n") in bulk.
+
+    `feed()` takes whatever bytes were read from the port, parses every
+    complete line at once into an (N, num_channels) array and keeps the
+    trailing partial line for the next call. Lines with the wrong number
+    of fields or non-integer tokens are dropped and counted in `malformed`.
+    """
+
+    def __init__(self, num_channels=10, max_line_length=256):
+        self.num_channels = num_channels
+        self.max_line_length = max_line_length
+        self.malformed = 0  # lines dropped so far
+        self.decoded = 0  # samples returned so far
+        self._pending = b""
+
+    def feed(self, data):
+        """Returns an (N, num_channels) int32 array for the complete lines in `data`."""
+        buf = self._pending + data if self._pending else bytes(data)
+        cut = buf.rfind(b"\n")
+        if cut < 0:
+            if len(buf) > self.max_line_length:  # no newline for too long: garbage
+                self.malformed += 1
+                buf = b""
+            self._pending = buf
+            return self._empty()
+        chunk, self._pending = buf[:cut + 1], buf[cut + 1:]
+
+        samples = self._parse(chunk)
+        self.decoded += len(samples)
+        return samples
+
+    def _empty(self):
+        return np.empty((0, self.num_channels), dtype=np.int32)
+
+    def _parse(self, chunk):
+        raw = np.frombuffer(chunk, dtype=np.uint8)
+        ws = _WHITESPACE[raw]
+        prev_ws = np.empty_like(ws)
+        prev_ws[0] = True
+        prev_ws[1:] = ws[:-1]
+        next_digit = np.empty_like(ws)
+        next_digit[-1] = False
+        next_digit[:-1] = _DIGIT[raw[1:]]
+
+        # line index of every byte (the chunk always ends with "\n")
+        newlines = np.flatnonzero(raw == 10)
+        line_of = np.searchsorted(newlines, np.arange(len(raw)))
+        num_lines = len(newlines)
+
+        token_start = ~ws & prev_ws
+        is_minus = raw == _MINUS
+        # allowed tokens are -?[0-9]+ : anything else marks the whole line bad
+        bad = ~(ws | _DIGIT[raw] | is_minus) | (is_minus & ~(prev_ws & next_digit))
+
+        tokens_per_line = np.bincount(line_of[token_start], minlength=num_lines)
+        bad_per_line = np.bincount(line_of[bad], minlength=num_lines)
+        good = (tokens_per_line == self.num_channels) & (bad_per_line == 0)
+        self.malformed += int(np.count_nonzero(~good & (tokens_per_line > 0)))
+
+        num_good = int(np.count_nonzero(good))
+        if num_good == 0:
+            return self._empty()
+        tokens = chunk.split()
+        if num_good != num_lines:
+            tokens = list(itertools.compress(tokens, np.repeat(good, tokens_per_line)))
+        try:
+            values = np.array(tokens).astype(np.int32)
+        except OverflowError:
+            return self._parse_slow(tokens)
+        return values.reshape(num_good, self.num_channels)
+
+    def _parse_slow(self, tokens):
+        """Fallback for out-of-range values: drop the offending lines only."""
+        rows = []
+        limit = np.iinfo(np.int32).max
+        for start in range(0, len(tokens), self.num_channels):
+            row = [int(t) for t in tokens[start:start + self.num_channels]]
+            if all(abs(v) <= limit for v in row):
+                rows.append(row)
+            else:
+                self.malformed += 1
+        if not rows:
+            return self._empty()
+        return np.array(rows, dtype=np.int32)
+
+
+def make_decoder(serial_format="ascii", num_channels=10):
+    """Returns the stream decoder for the board's output format: "ascii" lines or "binary" frames."""
+    if serial_format == "ascii":
+        return LineDecoder(num_channels)
+    if serial_format == "binary":
+        return FrameDecoder(num_channels)
+    raise ValueError(f"unknown serial format: {serial_format!r}")
+
+
+def read_chunk(ser):
+    """
+    Drains everything the serial driver has buffered. When nothing is waiting,
+    blocks for one byte (up to the port timeout) so callers do not spin.
+    """
+    waiting = ser.in_waiting
+    return ser.read(waiting if waiting else 1)
+
+
+def spread_timestamps(t_prev, t_now, n):
+    """Evenly spaces `n` sample times over (t_prev, t_now] for one decoded chunk."""
+    return np.linspace(t_prev, t_now, n + 1)[1:]
@@ -0,0 +1,122 @@
+import numpy as np
+
+from .features import NUM_FEATURES, extract_emg_features_batch, synthesize_time_series_batch
+from .windowing import sliding_windows, to_model_input
+
+
+class StreamingFeatureCache:
+    """
+    Incremental window / feature stage for the live pipeline.
+
+    Windows are keyed by absolute sample index: window k covers samples
+    [k * stride, k * stride + time_steps) of a RingBuffer (see
+    `RingBuffer.total`). `update` only processes windows that completed since
+    the previous call, so each window's features and synthesized EMG are
+    computed once instead of on every tick it stays in view. The newest
+    `num_windows` results live in fixed rings that are mirrored like
+    RingBuffer, so the ordered model input is always one contiguous slice.
+
+    Parameters:
+    - num_windows: Windows per model input (19 for 1000 samples at stride 50)
+    - time_steps: Samples per window
+    - stride: Samples between window starts
+    - num_channels: Values per sample (4 EMG + 6 IMU by default)
+    - num_replaced: Leading channels replaced by synthetic series (0 keeps raw data)
+    - fs: Sampling frequency
+    - noise: NoiseSource for the synthesis stage (`default_noise` if None)
+    """
+
+    def __init__(self, num_windows=19, time_steps=100, stride=50, num_channels=10,
+                 num_replaced=4, fs=1000, noise=None):
+        self.num_windows = num_windows
+        self.time_steps = time_steps
+        self.stride = stride
+        self.num_replaced = num_replaced
+        self.fs = fs
+        self.noise = noise
+        self._windows = np.zeros((2 * num_windows, time_steps, num_channels))
+        self._features = np.zeros((2 * num_windows, num_replaced, NUM_FEATURES))
+        self.reset()
+
+    def reset(self, next_window=0):
+        """Drops cached windows; the next contiguous run starts at `next_window`."""
+        self.next_window = next_window  # absolute index of the next window to compute
+        self._run_start = next_window  # first window of the current gap-free run
+        self.computed = 0  # windows processed since construction / reset
+
+    @property
+    def nbytes(self):
+        """Memory held by the window and feature rings."""
+        return self._windows.nbytes + self._features.nbytes
+
+    @property
+    def ready(self):
+        """True once the newest `num_windows` windows are all cached and contiguous."""
+        return self.next_window - self._run_start >= self.num_windows
+
+    @property
+    def end_sample(self):
+        """Absolute index one past the last sample of the newest cached window."""
+        return (self.next_window - 1) * self.stride + self.time_steps
+
+    def update(self, buffer):
+        """
+        Processes every window of `buffer` (a RingBuffer) completed since the
+        last call and returns how many were added.
+
+        Windows already overwritten in `buffer`, or older than the newest
+        `num_windows`, are skipped; if that leaves a gap the cache becomes
+        not `ready` until it has refilled.
+        """
+        total = buffer.total
+        if total < self.time_steps:
+            return 0
+        last = (total - self.time_steps) // self.stride  # newest completed window
+        oldest_sample = total - len(buffer)
+        first = max(self.next_window,
+                    last + 1 - self.num_windows,
+                    -(-oldest_sample // self.stride))
+        if first > last:
+            return 0
+        if first != self.next_window:
+            self._run_start = first
+
+        data = buffer.span(first * self.stride, last * self.stride + self.time_steps,
+                           dtype=np.float64)
+        windows = sliding_windows(data, self.time_steps, self.stride)  # (k, T, C)
+        slots = np.arange(first, last + 1) % self.num_windows
+        self._write(self._windows, slots, windows)
+
+        if self.num_replaced:
+            features = extract_emg_features_batch(windows[..., :self.num_replaced], self.fs)
+            series = synthesize_time_series_batch(features, self.time_steps, self.noise)
+            self._write(self._features, slots, features)
+            series = np.moveaxis(series, -1, -2)  # (k, T, R)
+            self._windows[slots, :, :self.num_replaced] = series
+            self._windows[slots + self.num_windows, :, :self.num_replaced] = series
+
+        self.next_window = last + 1
+        self.computed += len(slots)
+        return len(slots)
+
+    def _write(self, ring, slots, values):
+        ring[slots] = values
+        ring[slots + self.num_windows] = values
+
+    def windows(self):
+        """
+        (num_windows, time_steps, num_channels) view of the cached windows,
+        oldest first, with the first `num_replaced` channels synthesized and
+        the rest (IMU) raw. Valid until the next `update`.
+        """
+        start = self.next_window % self.num_windows
+        return self._windows[start:start + self.num_windows]
+
+    def features(self):
+        """(num_windows, num_replaced, 7) view of the cached features, oldest first."""
+        start = self.next_window % self.num_windows
+        return self._features[start:start + self.num_windows]
+
+    def model_input(self, out=None):
+        """Cached windows in the (1, num_windows, time_steps * num_channels) model layout."""
+        return to_model_input(self.windows(), out)
@@ -0,0 +1,131 @@
+import os
+
+import numpy as np
+
+RECURRENT_LAYERS = ("LSTM", "GRU", "SimpleRNN")
+# layers that act on each time step independently, so they stream unchanged
+TIME_LOCAL_LAYERS = ("Dropout", "Dense", "TimeDistributed", "BatchNormalization",
+                     "LayerNormalization", "Activation", "Masking", "GaussianNoise")
+
+
+def _check_streamable(model):
+    """Index of the last recurrent layer; raises ValueError if the model cannot stream."""
+    layers = model.layers
+    names = [layer.__class__.__name__ for layer in layers]
+    if not any(name in RECURRENT_LAYERS for name in names):
+        raise ValueError("model has no LSTM / GRU / SimpleRNN layer to stream")
+    last = max(i for i, name in enumerate(names) if name in RECURRENT_LAYERS)
+    for name in names[:last]:
+        if name not in RECURRENT_LAYERS + TIME_LOCAL_LAYERS:
+            raise ValueError(f"{name} mixes time steps before the last recurrent layer; "
+                             "only LSTM / GRU / SimpleRNN stacks can be streamed")
+    if layers[last].get_config().get("return_sequences"):
+        raise ValueError("the last recurrent layer must have return_sequences=False")
+    return last
+
+
+def build_streaming_model(model):
+    """
+    Stateful, batch-1 copy of a trained recurrent Sequential model (e.g. the
+    LSTM(64) -> LSTM(128) -> Dense stacks of `models_lstm.ipynb`) that takes
+    (1, k, features) inputs and keeps its recurrent state between calls.
+    The weights are copied layer by layer.
+    """
+    import tensorflow as tf
+
+    _check_streamable(model)
+    num_features = model.input_shape[-1]
+    layers = [tf.keras.Input(batch_shape=(1, None, num_features))]
+    for layer in model.layers:
+        config = layer.get_config()
+        for key in ("batch_input_shape", "batch_shape", "input_shape"):
+            config.pop(key, None)  # the new Input layer fixes batch size 1
+        if layer.__class__.__name__ in RECURRENT_LAYERS:
+            config["stateful"] = True
+        layers.append(layer.__class__.from_config(config))
+    streaming = tf.keras.Sequential(layers)
+    for source, target in zip(model.layers, streaming.layers):
+        target.set_weights(source.get_weights())
+    return streaming
+
+
+class StreamingRecurrentPredictor:
+    """
+    Recurrent model that consumes only the newest window(s) on each tick.
+
+    The full-sequence model reruns all 19 windows on every prediction; this
+    variant carries the LSTM state between calls, so a tick costs one
+    window's worth of recurrent compute. After `reset()` and k windows the
+    output equals the full model run on those k windows, so reset at
+    gesture onset (and feed the cached windows once) to match the model's
+    training view of a gesture. Later ticks carry state from every window
+    since the reset, so they drift from the full model's sliding 19-window
+    view; `benchmarks/streaming_rnn_check.py` measures by how much.
+
+    Parameters:
+    - model: A loaded recurrent Keras model, or a path to a `.h5` file
+    - warmup: Steps run (and then reset) at construction
+    """
+
+    def __init__(self, model, warmup=3):
+        import tensorflow as tf
+
+        if isinstance(model, (str, os.PathLike)):
+            model = tf.keras.models.load_model(model, compile=False)
+        self.full_model = model
+        self.model = build_streaming_model(model)
+        self.num_features = model.input_shape[-1]
+        self._recurrent = [layer for layer in self.model.layers
+                           if layer.__class__.__name__ in RECURRENT_LAYERS]
+
+        @tf.function(input_signature=[tf.TensorSpec((1, None, self.num_features), tf.float32)])
+        def forward(x):
+            return self.model(x, training=False)
+
+        forward.get_concrete_function()
+        self._forward = forward
+        self.calls = 0
+        self.onset = None  # onset the state was last reset for (see `tick`)
+        for _ in range(warmup):
+            self.step(np.zeros((1, self.num_features), dtype=np.float32))
+        self.reset()
+
+    def reset(self):
+        """Clears the recurrent state (call at gesture onset)."""
+        for layer in self._recurrent:
+            layer.reset_states()
+        self.steps = 0
+
+    def tick(self, windows, new_windows, onset=None):
+        """
+        Live per-tick call on the cached (num_windows, features) model input:
+        on a new `onset` (e.g. `MotionGate.onset_sample`) the state is reset
+        and every cached window is fed, otherwise only the newest
+        `new_windows` (all of them after a manual `reset`). Returns the
+        (1, num_classes) output, or None if no window was added.
+        """
+        if onset != self.onset or not self.steps:
+            self.reset()
+            self.onset = onset
+            new_windows = len(windows)
+        if not new_windows:
+            return None
+        return self.step(windows[-min(new_windows, len(windows)):])
+
+    def step(self, windows):
+        """
+        Feeds (k, features) new windows (or one (features,) window), oldest
+        first, and returns the (1, num_classes) output after the newest.
+        """
+        x = np.asarray(windows, dtype=np.float32).reshape(1, -1, self.num_features)
+        self.calls += 1
+        self.steps += x.shape[1]
+        return self._forward(x).numpy()
+
+    def __call__(self, x):
+        """Full-sequence compatible call: resets, then feeds every window of x."""
+        self.reset()
+        return self.step(x)
+
+    def predict(self, x, verbose=0):
+        return self(x)
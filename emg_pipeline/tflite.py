@@ -0,0 +1,144 @@
+import threading
+
+import numpy as np
+
+QUANTIZE_MODES = ("none", "dynamic", "int8")
+
+
+def export_tflite(model, output_path, quantize="none", calibration_data=None, num_calibration=200):
+    """
+    Converts a trained Keras model (or `.h5` path) to a TFLite flatbuffer.
+
+    Parameters:
+    - model: Loaded Keras model or path to it
+    - output_path: Where to write the `.tflite` file
+    - quantize: "none" (float32), "dynamic" (int8 weights) or "int8" (int8
+      weights and activations, calibrated on `calibration_data`)
+    - calibration_data: (N, W, F) model inputs, e.g. from `prepare_model_inputs`
+    - num_calibration: Calibration samples used for "int8"
+
+    Returns:
+    - size: Size of the written file in bytes
+    """
+    import tensorflow as tf
+
+    if quantize not in QUANTIZE_MODES:
+        raise ValueError(f"quantize must be one of {QUANTIZE_MODES}, got {quantize!r}")
+    if isinstance(model, str):
+        model = tf.keras.models.load_model(model, compile=False)
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantize != "none":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantize == "int8":
+        if calibration_data is None:
+            raise ValueError("int8 quantization needs calibration_data")
+        rng = np.random.default_rng(0)
+        picks = rng.permutation(len(calibration_data))[:num_calibration]
+
+        def representative_dataset():
+            for i in picks:
+                yield [np.asarray(calibration_data[i:i + 1], dtype=np.float32)]
+
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+
+    flatbuffer = converter.convert()
+    with open(output_path, "wb") as f:
+        f.write(flatbuffer)
+    return len(flatbuffer)
+
+
+def _load_interpreter():
+    """`tflite_runtime` if installed (no TensorFlow needed), else `tf.lite`."""
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        import tensorflow as tf
+        Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+
+def _quantize(x, detail, out):
+    """Writes `x` into the interpreter input buffer `out`, quantizing for int8 inputs."""
+    scale, zero_point = detail["quantization"]
+    if scale:
+        info = np.iinfo(out.dtype)
+        x = np.clip(np.round(x / scale + zero_point), info.min, info.max)
+    np.copyto(out, x, casting="unsafe")
+
+
+def _dequantize(output, detail):
+    scale, zero_point = detail["quantization"]
+    if scale:
+        return (output.astype(np.float32) - zero_point) * scale
+    return output.copy()
+
+
+class TFLitePredictor:
+    """
+    Runs an exported `.tflite` model with the same call interface as
+    `CompiledPredictor`, quantizing the input / dequantizing the output when
+    the model uses int8 I/O.
+
+    Parameters:
+    - model_path: `.tflite` file written by `export_tflite`
+    - num_threads: Interpreter threads (None lets the runtime decide)
+    """
+
+    def __init__(self, model_path, num_threads=None):
+        self.model_path = model_path
+        self.num_threads = num_threads
+        self.interpreter = self._make_interpreter()
+        self._in = self.interpreter.get_input_details()[0]
+        self._out = self.interpreter.get_output_details()[0]
+        self.input_shape = tuple(self._in["shape"])
+        self._input = np.zeros(self.input_shape, dtype=self._in["dtype"])
+        self._batch_interpreters = {}  # padded batch size -> (interpreter, input buffer)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _make_interpreter(self, batch_size=None):
+        interpreter = _load_interpreter()(model_path=self.model_path, num_threads=self.num_threads)
+        if batch_size is not None:
+            index = interpreter.get_input_details()[0]["index"]
+            interpreter.resize_tensor_input(index, (batch_size,) + self.input_shape[1:])
+        interpreter.allocate_tensors()
+        return interpreter
+
+    def __call__(self, x):
+        """Returns the (1, num_classes) float output for one (1, W, F) or (W, F) input."""
+        x = np.reshape(x, self.input_shape)
+        with self._lock:
+            _quantize(x, self._in, self._input)
+            self.interpreter.set_tensor(self._in["index"], self._input)
+            self.interpreter.invoke()
+            output = self.interpreter.get_tensor(self._out["index"])
+            self.calls += 1
+            return _dequantize(output, self._out)
+
+    def predict(self, x, verbose=0):
+        """Drop-in for `model.predict` on a single sample."""
+        return self(x)
+
+    def predict_batch(self, X):
+        """
+        Returns the (N, num_classes) output for an (N, W, F) batch. Batches are
+        padded to the next power of two (padding rows are ignored), with one
+        resized interpreter per padded size, so varying batch sizes never
+        reallocate tensors.
+        """
+        n = len(X)
+        size = 1 << (n - 1).bit_length()
+        with self._lock:
+            if size not in self._batch_interpreters:
+                self._batch_interpreters[size] = (
+                    self._make_interpreter(size),
+                    np.zeros((size,) + self.input_shape[1:], dtype=self._in["dtype"]))
+            interpreter, buf = self._batch_interpreters[size]
+            _quantize(X, self._in, buf[:n])
+            interpreter.set_tensor(self._in["index"], buf)
+            interpreter.invoke()
+            output = interpreter.get_tensor(self._out["index"])[:n]
+            self.calls += 1
+            return _dequantize(output, self._out)
@@ -0,0 +1,109 @@
+"""
+Binary waveform messages from the backend to the dashboard.
+
+Each message carries only the samples that arrived since the previous
+one, reduced to the dashboard's pixel budget:
+
+    uint32 start      absolute index of the first sample covered (see `RingBuffer.total`)
+    uint16 factor     samples per bucket (1: raw samples, no decimation)
+    uint16 rows       rows of data that follow
+    uint16 channels   values per row (10)
+    int16  data[rows, channels]  row-major, little-endian
+
+With factor > 1 every bucket of `factor` samples becomes two rows, its
+per-channel minimum then maximum, so peaks survive the decimation and row
+r covers samples [start + (r // 2) * factor, start + (r // 2 + 1) * factor).
+"""
+import math
+import struct
+
+import numpy as np
+
+WAVEFORM_HEADER = struct.Struct("<IHHH")
+
+
+def decimation_factor(window, pixels):
+    """Samples per bucket so that `window` samples fit in `pixels` columns (1 for no budget)."""
+    return max(1, math.ceil(int(window) / int(pixels))) if pixels else 1
+
+
+def minmax_decimate(samples, factor):
+    """
+    (n // factor * 2, C) min / max envelope of a (n, C) block: the minimum
+    and maximum of every full bucket of `factor` samples, interleaved.
+    Trailing samples that do not fill a bucket are ignored.
+    """
+    samples = np.asarray(samples)
+    if factor <= 1:
+        return samples
+    buckets = samples[:len(samples) // factor * factor].reshape(-1, factor, samples.shape[1])
+    envelope = np.empty((len(buckets), 2, samples.shape[1]), dtype=samples.dtype)
+    np.min(buckets, axis=1, out=envelope[:, 0])
+    np.max(buckets, axis=1, out=envelope[:, 1])
+    return envelope.reshape(-1, samples.shape[1])
+
+
+def pack_waveform(start, factor, rows):
+    """Packs (rows, C) decimated data starting at absolute sample `start` into one message."""
+    rows = np.asarray(rows, dtype="<i2")
+    count, channels = rows.shape
+    return WAVEFORM_HEADER.pack(start & 0xFFFFFFFF, factor, count, channels) + rows.tobytes()
+
+
+def unpack_waveform(message):
+    """Returns (start, factor, rows) for a waveform message, `rows` a read-only (rows, C) int16 view."""
+    if len(message) < WAVEFORM_HEADER.size:
+        raise ValueError(f"waveform message too short: {len(message)} bytes")
+    start, factor, count, channels = WAVEFORM_HEADER.unpack_from(message)
+    expected = WAVEFORM_HEADER.size + 2 * count * channels
+    if len(message) != expected:
+        raise ValueError(f"waveform message has {len(message)} bytes, header says {expected}")
+    rows = np.frombuffer(message, dtype="<i2", count=count * channels, offset=WAVEFORM_HEADER.size)
+    return start, factor, rows.reshape(count, channels)
+
+
+class WaveformStream:
+    """
+    Incremental waveform for one dashboard: each `next_message` call packs
+    the samples of a `RingBuffer` written since the previous call, min / max
+    decimated so that `window` samples fit in `pixels` columns.
+
+    Buckets are aligned on absolute sample indices, so consecutive messages
+    join without gaps or overlap; a partial bucket waits for the next call.
+    The first message (and any message after the client fell further behind
+    than the buffer holds) starts at most `window` samples back.
+
+    Parameters:
+    - window: Samples shown by the dashboard (5 s at 1 kHz)
+    - pixels: Horizontal pixel budget of the chart (None: no decimation)
+    """
+
+    def __init__(self, window=5000, pixels=None):
+        self.window = int(window)
+        self.next_sample = None  # absolute index of the first sample not sent yet
+        self.messages = 0
+        self.bytes_sent = 0
+        self.set_pixels(pixels)
+
+    def set_pixels(self, pixels):
+        """Changes the pixel budget (e.g. on a chart resize); later messages use the new factor."""
+        self.pixels = int(pixels) if pixels else None
+        self.factor = decimation_factor(self.window, self.pixels)
+
+    def next_message(self, buffer):
+        """Binary message with the new samples of `buffer`, or None if no full bucket arrived."""
+        factor = self.factor
+        total = buffer.total
+        oldest = total - len(buffer)
+        start = max(total - self.window, oldest) if self.next_sample is None else self.next_sample
+        start = max(start, oldest)
+        start = -(-start // factor) * factor  # first bucket boundary at or after start
+        stop = total // factor * factor
+        if stop <= start:
+            return None
+        rows = minmax_decimate(buffer.span(start, stop), factor)
+        self.next_sample = stop
+        message = pack_waveform(start, factor, rows)
+        self.messages += 1
+        self.bytes_sent += len(message)
+        return message
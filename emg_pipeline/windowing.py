@@ -0,0 +1,36 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def count_windows(num_samples, time_steps=100, stride=50):
+    """Number of windows `sliding_windows` yields for `num_samples` samples."""
+    if num_samples < time_steps:
+        return 0
+    return (num_samples - time_steps) // stride + 1
+
+
+def sliding_windows(data, time_steps=100, stride=50):
+    """
+    Splits a (num_samples, num_channels) signal into overlapping windows.
+
+    Returns a read-only (num_windows, time_steps, num_channels) strided view
+    of `data`: window j covers data[j * stride : j * stride + time_steps]
+    and no sample is copied, however much the windows overlap.
+    """
+    if len(data) < time_steps:
+        raise ValueError(f"need at least {time_steps} samples, got {len(data)}")
+    view = sliding_window_view(data, time_steps, axis=0)[::stride]  # (W, C, T)
+    return view.transpose(0, 2, 1)
+
+
+def to_model_input(windows, out=None):
+    """
+    Flattens a (num_windows, time_steps, num_channels) window tensor into the
+    (1, num_windows, time_steps * num_channels) layout the models take. This
+    is the single copy of the pipeline; pass `out` to reuse a buffer.
+    """
+    num_windows, time_steps, num_channels = windows.shape[-3:]
+    if out is None:
+        out = np.empty((1, num_windows, time_steps * num_channels), dtype=np.float32)
+    np.copyto(out.reshape(num_windows, time_steps, num_channels), windows, casting="unsafe")
+    return out
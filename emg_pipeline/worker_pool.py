@@ -0,0 +1,257 @@
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+def auto_affinity(num_workers, threads_per_worker):
+    """Disjoint blocks of `threads_per_worker` CPUs per worker (wrapping around)."""
+    cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count()))
+    return [
+        sorted({cpus[(w * threads_per_worker + t) % len(cpus)] for t in range(threads_per_worker)})
+        for w in range(num_workers)
+    ]
+
+
+def _worker_main(index, shm_name, slot_shape, model_path, backend, intra_op_threads,
+                 inter_op_threads, cpus, tasks, results):
+    """Worker process: pin, size the thread pools, load the model, then serve slots."""
+    if cpus is not None and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    os.environ["OMP_NUM_THREADS"] = str(intra_op_threads)
+    try:
+        if backend == "keras":
+            import tensorflow as tf
+            tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+            tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+        from .predictor import load_predictor
+        predictor = load_predictor(model_path, backend, num_threads=intra_op_threads)
+    except Exception as e:
+        results.put(("error", index, repr(e)))
+        return
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    slots = np.ndarray(slot_shape, dtype=np.float32, buffer=shm.buf)
+    results.put(("ready", index, None))
+    try:
+        while True:
+            job = tasks.get()
+            if job is None:
+                break
+            job_id, slot, n = job
+            try:
+                if n == 1:
+                    output = predictor(slots[slot, :1])
+                else:
+                    output = predictor.predict_batch(slots[slot, :n])
+            except Exception as e:
+                output = e
+            results.put((job_id, slot, output))
+    finally:
+        del slots
+        shm.close()
+
+
+class WorkerPool:
+    """
+    K inference processes with a fixed intra-op thread count and optional CPU
+    affinity each, so the model never oversubscribes the machine or competes
+    with the serial / WebSocket threads of the ingest process.
+
+    Inputs are written into shared-memory slots (`num_slots` x `slot_batch`
+    rows of `input_shape`) and only the slot index crosses the process
+    boundary; results come back over a queue. The call interface matches
+    `CompiledPredictor` (`__call__`, `predict`, `predict_batch`), plus
+    `submit` which returns a `concurrent.futures.Future`.
+
+    Create it under `if __name__ == "__main__":` (workers are spawned on
+    Windows, which re-imports the main module).
+
+    If a worker process dies (OOM, a crash inside the runtime), pending and
+    later calls raise a `RuntimeError` naming it instead of waiting forever.
+
+    Parameters:
+    - model_path: Model loaded by every worker (see `load_predictor`)
+    - backend: "keras" or "tflite"
+    - num_workers: Worker processes
+    - intra_op_threads: Threads per worker for one forward pass
+    - inter_op_threads: TensorFlow inter-op threads per worker
+    - cpu_affinity: None (no pinning), "auto" (`auto_affinity`) or one CPU list per worker
+    - input_shape: Per-sample model input shape
+    - slot_batch: Rows per slot, i.e. the largest `predict_batch`
+    - num_slots: Shared-memory slots (default 2 per worker)
+    """
+
+    def __init__(self, model_path, backend="keras", num_workers=2, intra_op_threads=1,
+                 inter_op_threads=1, cpu_affinity=None, input_shape=(19, 1000), slot_batch=1,
+                 num_slots=None, start_timeout=120):
+        self.num_workers = num_workers
+        self.intra_op_threads = intra_op_threads
+        self.input_shape = (1,) + tuple(input_shape)
+        self.slot_batch = slot_batch
+        num_slots = num_slots or 2 * num_workers
+        if cpu_affinity == "auto":
+            cpu_affinity = auto_affinity(num_workers, intra_op_threads)
+        self.cpu_affinity = cpu_affinity
+        self._closing = False
+        self._error = None  # RuntimeError once a worker has died
+
+        slot_shape = (num_slots, slot_batch) + tuple(input_shape)
+        self._shm = shared_memory.SharedMemory(create=True, size=int(np.prod(slot_shape)) * 4)
+        self._slots = np.ndarray(slot_shape, dtype=np.float32, buffer=self._shm.buf)
+        self._free = queue.Queue()
+        for slot in range(num_slots):
+            self._free.put(slot)
+
+        ctx = mp.get_context("spawn")  # no forked TensorFlow / thread state
+        self._tasks = ctx.Queue()
+        self._results = ctx.Queue()
+        self._workers = [
+            ctx.Process(
+                target=_worker_main, daemon=True, name=f"inference-worker-{i}",
+                args=(i, self._shm.name, slot_shape, model_path, backend, intra_op_threads,
+                      inter_op_threads, None if cpu_affinity is None else cpu_affinity[i],
+                      self._tasks, self._results))
+            for i in range(num_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+        self._wait_ready(start_timeout)
+
+        self._ids = itertools.count()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.completed = 0
+        self._collector = threading.Thread(target=self._collect, daemon=True, name="inference-results")
+        self._collector.start()
+
+    def _wait_ready(self, timeout):
+        deadline = time.monotonic() + timeout
+        ready = 0
+        while ready < len(self._workers):
+            try:
+                status, index, error = self._results.get(timeout=0.5)
+            except queue.Empty:
+                dead = [w.name for w in self._workers if w.exitcode is not None]
+                if dead or time.monotonic() > deadline:
+                    self.close()
+                    raise RuntimeError(f"inference workers not ready (exited: {dead or 'none'})")
+                continue
+            if status == "error":
+                self.close()
+                raise RuntimeError(f"inference worker {index} failed to load the model: {error}")
+            ready += 1
+
+    def _dead_workers(self):
+        return [f"{w.name} (exit code {w.exitcode})" for w in self._workers if w.exitcode is not None]
+
+    def _fail_if_dead(self):
+        """Fails every pending call once a worker has died (outside `close`); True if one has."""
+        dead = self._dead_workers()
+        if not dead or self._closing:
+            return False
+        with self._lock:
+            self._error = RuntimeError(f"inference worker died: {', '.join(dead)}")
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(self._error)
+        return True
+
+    def _collect(self):
+        # Liveness is checked every 0.5 s even while results keep arriving: under
+        # load from the other workers the queue never runs empty.
+        next_check = time.monotonic() + 0.5
+        while True:
+            try:
+                message = self._results.get(timeout=0.5)
+            except queue.Empty:
+                message = False
+            if message is False or time.monotonic() >= next_check:
+                next_check = time.monotonic() + 0.5
+                if self._fail_if_dead():
+                    break
+            if message is False:
+                continue
+            if message is None:
+                break
+            job_id, slot, output = message
+            self._free.put(slot)
+            with self._lock:
+                future = self._pending.pop(job_id, None)
+                self.completed += 1
+            if future is None:
+                continue
+            if isinstance(output, Exception):
+                future.set_exception(output)
+            else:
+                future.set_result(output)
+
+    def submit(self, X, block=True, timeout=None):
+        """
+        Queues a (n, W, F) input (n <= slot_batch, or a single (W, F) sample).
+        Returns a Future for the (n, num_classes) output, or None if
+        `block=False` / `timeout` passes and every slot is busy.
+        """
+        X = np.asarray(X, dtype=np.float32).reshape((-1,) + self.input_shape[1:])
+        n = len(X)
+        if n > self.slot_batch:
+            raise ValueError(f"batch of {n} exceeds slot_batch={self.slot_batch}")
+        if self._error is not None:
+            raise self._error
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:  # wake up regularly so a dead worker is noticed while waiting for a slot
+            wait = 0.5 if deadline is None else min(0.5, max(deadline - time.monotonic(), 0))
+            try:
+                slot = self._free.get(block, wait)
+                break
+            except queue.Empty:
+                if self._error is not None:
+                    raise self._error
+                if not block or (deadline is not None and time.monotonic() >= deadline):
+                    return None
+        self._slots[slot, :n] = X
+        future = Future()
+        job_id = next(self._ids)
+        with self._lock:
+            if self._error is not None:
+                self._free.put(slot)
+                raise self._error
+            self._pending[job_id] = future
+        self._tasks.put((job_id, slot, n))
+        return future
+
+    def __call__(self, x):
+        return self.submit(x).result()
+
+    def predict(self, x, verbose=0):
+        return self(x)
+
+    def predict_batch(self, X):
+        """Splits into slot-sized chunks that run on the workers in parallel."""
+        futures = [self.submit(X[i:i + self.slot_batch]) for i in range(0, len(X), self.slot_batch)]
+        return np.concatenate([f.result() for f in futures], axis=0)
+
+    def close(self):
+        self._closing = True
+        for _ in self._workers:
+            self._tasks.put(None)
+        for worker in self._workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+        if getattr(self, "_collector", None) is not None:
+            self._results.put(None)
+            self._collector.join(timeout=5)
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            for future in pending.values():  # callers blocked in result() must not hang
+                future.set_exception(RuntimeError("worker pool closed"))
+        del self._slots
+        self._shm.close()
+        self._shm.unlink()
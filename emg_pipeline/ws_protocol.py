@@ -0,0 +1,55 @@
+"""
+Binary WebSocket messages between arduino_reader.py and the backend.
+
+One message carries K consecutive samples:
+
+    uint32 start_seq    sequence number of the first sample
+    uint16 count        K
+    uint16 channels     values per sample (10)
+    int16  data[K, channels]  row-major, little-endian
+
+The JSON text message ({"emg": [...], "acc": [...], "gyro": [...]}) is
+still accepted by the consumers for compatibility.
+"""
+import struct
+
+import numpy as np
+
+BATCH_HEADER = struct.Struct("<IHH")
+
+
+def pack_batch(samples, start_seq=0):
+    """Packs a (K, C) block of samples into one binary message."""
+    samples = np.asarray(samples, dtype="<i2")
+    count, channels = samples.shape
+    return BATCH_HEADER.pack(start_seq & 0xFFFFFFFF, count, channels) + samples.tobytes()
+
+
+def unpack_batch(message):
+    """
+    Returns (start_seq, samples) for a binary message, `samples` being a
+    read-only (K, C) int16 view into `message`.
+    """
+    if len(message) < BATCH_HEADER.size:
+        raise ValueError(f"batch message too short: {len(message)} bytes")
+    start_seq, count, channels = BATCH_HEADER.unpack_from(message)
+    expected = BATCH_HEADER.size + 2 * count * channels
+    if len(message) != expected:
+        raise ValueError(f"batch message has {len(message)} bytes, header says {expected}")
+    samples = np.frombuffer(message, dtype="<i2", count=count * channels, offset=BATCH_HEADER.size)
+    return start_seq, samples.reshape(count, channels)
+
+
+class SequenceTracker:
+    """Counts samples lost between batches from gaps in `start_seq`."""
+
+    def __init__(self):
+        self.next_seq = None
+        self.dropped = 0
+
+    def update(self, start_seq, count):
+        if self.next_seq is not None and start_seq != self.next_seq:
+            gap = (start_seq - self.next_seq) & 0xFFFFFFFF
+            if gap < 0x80000000:  # ignore replays / reconnects that restart the counter
+                self.dropped += gap
+        self.next_seq = (start_seq + count) & 0xFFFFFFFF
@@ -0,0 +1,42 @@
+"""
+Exports a trained Keras gesture model (.h5) to TFLite for the lightweight
+CPU runtime (`emg_pipeline.TFLitePredictor`, selected with
+MODEL_BACKEND = "tflite" in inference.py).
+
+    python export_tflite.py weights/cnn_emg_model_all_1.h5 --quantize int8 --data new_collect
+
+Writes <model>.tflite (float32), <model>_dynamic.tflite or <model>_int8.tflite
+next to the .h5 file unless --output is given. int8 calibration uses the
+processed_gesture_data.npy sets under --data, preprocessed the same way as
+for training (--num-replaced leading channels replaced by synthetic series).
+"""
+import argparse
+import os
+
+from emg_pipeline import NoiseSource, QUANTIZE_MODES, export_tflite, load_gesture_sets, prepare_model_inputs
+
+
+def default_output_path(model_path, quantize):
+    base = os.path.splitext(model_path)[0]
+    return base + (".tflite" if quantize == "none" else f"_{quantize}.tflite")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a Keras .h5 gesture model to TFLite")
+    parser.add_argument("model_path")
+    parser.add_argument("--quantize", choices=QUANTIZE_MODES, default="int8")
+    parser.add_argument("--data", default="new_collect", help="folder with processed_gesture_data.npy sets")
+    parser.add_argument("--num-replaced", type=int, default=4, help="channels replaced by synthetic series (0 = raw)")
+    parser.add_argument("--num-calibration", type=int, default=200)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    calibration = None
+    if args.quantize == "int8":
+        X, _ = load_gesture_sets(args.data)
+        calibration = prepare_model_inputs(X, args.num_replaced, noise=NoiseSource(seed=0))
+        print(f"[INFO] 校准数据: {calibration.shape}")
+
+    output_path = args.output or default_output_path(args.model_path, args.quantize)
+    size = export_tflite(args.model_path, output_path, args.quantize, calibration, args.num_calibration)
+    print(f"[INFO] 已导出 {output_path} ({size / 1024:.1f} KiB, {args.quantize})")
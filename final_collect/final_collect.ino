@@ -17,6 +17,44 @@ volatile int emgValue4 = 0;
 // Timer flag
 volatile bool dataReadyFlag = false;
 
+// Output format: 0 = ASCII lines, 1 = binary frames
+// (decoded on the host by emg_pipeline.framing.FrameDecoder)
+#define BINARY_FRAMES 0
+
+// Binary frame, little-endian, 26 bytes
+struct __attribute__((packed)) SensorFrame {
+  uint16_t sync;      // 0xA55A
+  uint16_t seq;       // sample counter, wraps at 65536
+  int16_t ch[10];     // EMG1-4, AccX/Y/Z, GyroX/Y/Z
+  uint16_t checksum;  // (seq + sum(ch)) & 0xFFFF
+};
+
+uint16_t frameSeq = 0;
+
+void sendFrame(int emg1, int emg2, int emg3, int emg4) {
+  SensorFrame frame;
+  frame.sync = 0xA55A;
+  frame.seq = frameSeq++;
+  frame.ch[0] = emg1;
+  frame.ch[1] = emg2;
+  frame.ch[2] = emg3;
+  frame.ch[3] = emg4;
+  frame.ch[4] = AccX;
+  frame.ch[5] = AccY;
+  frame.ch[6] = AccZ;
+  frame.ch[7] = GyroX;
+  frame.ch[8] = GyroY;
+  frame.ch[9] = GyroZ;
+
+  uint16_t sum = frame.seq;
+  for (int i = 0; i < 10; i++) {
+    sum += (uint16_t)frame.ch[i];
+  }
+  frame.checksum = sum;
+
+  Serial.write((const uint8_t *)&frame, sizeof(frame));
+}
+
 // Function to read IMU data
 void readIMU() {
   Wire.beginTransmission(MPU6050_addr);
@@ -79,6 +117,9 @@ void loop() {
     readIMU();
 
     if (imuReadyFlag) {
+#if BINARY_FRAMES
+      sendFrame(emgCopy1, emgCopy2, emgCopy3, emgCopy4);
+#else
       // Print all data
       Serial.print(emgCopy1); Serial.print(" ");
       Serial.print(emgCopy2); Serial.print(" ");
@@ -90,6 +131,7 @@ void loop() {
       Serial.print(GyroX); Serial.print(" ");
       Serial.print(GyroY); Serial.print(" ");
       Serial.println(GyroZ);
+#endif
 
       imuReadyFlag = false; // Reset IMU flag
     }
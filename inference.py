@@ -4,103 +4,137 @@ import csv
 import os
 import time
 import numpy as np
-from datetime import datetime
-from collections import deque
-from tensorflow.keras.models import load_model
 from sklearn.preprocessing import StandardScaler
+from emg_pipeline import ClassifierPredictor, EnsemblePredictor, LatestQueue, cache_features, load_cascade, ModelRegistry, MotionGate, RingBuffer, StreamingFeatureCache, StreamingRecurrentPredictor, WorkerPool, count_windows, load_predictor, make_decoder, read_chunk
+
+# **传感器数据格式 (EMG + IMU)**
+NUM_CHANNELS = 10  # 4 EMG + 6 IMU
+
 # **全局变量**
-data_buffer = deque(maxlen=5000)  # 5s 数据缓存
+data_buffer = RingBuffer(5000, NUM_CHANNELS)  # 5s 数据缓存 (int16 环形缓冲)
 stop_event = threading.Event()
+prediction_queue = LatestQueue()  # 预处理 -> 预测: 只保留最新输入, 旧输入直接覆盖
 
 # **串口配置**
 SERIAL_PORT = "COM3"  # 修改为 Arduino 端口
 BAUD_RATE = 115200
+SERIAL_FORMAT = "ascii"  # "ascii": 文本行; "binary": 二进制帧 (final_collect.ino 中 BINARY_FRAMES=1)
 FILENAME = "sensor_data.csv"
 
 # **LSTM 模型**
 
 
-# **传感器数据格式 (EMG + IMU)**
-NUM_CHANNELS = 10  # 4 EMG + 6 IMU
+# **窗口参数**
 WINDOW_SIZE = 1000  # 5s 数据 (1000ms * 5)
 STRIDE = 50  # 每 50ms 处理一次
 TIME_STEPS = 100  # LSTM 期望的 time_steps
-NUM_WINDOWS = 19  # 计算得到的时间窗口数量
+NUM_WINDOWS = count_windows(WINDOW_SIZE, TIME_STEPS, STRIDE)  # 计算得到的时间窗口数量 (19)
 
 FEATURE = True
 EMG = True
 
 CHOSSEN_CHANNELS = 4 if EMG else 10
 MODEL_PATH = "weights/cnn_emg_model_all_1.h5" if EMG else "weights/cnn_emg_model_all_channels.h5"
+# **推理后端**: "keras" 直接运行 .h5; "tflite" 运行 export_tflite.py 导出的模型 (可不装 TensorFlow)
+MODEL_BACKEND = "keras"
+if MODEL_BACKEND == "tflite":
+    MODEL_PATH = os.path.splitext(MODEL_PATH)[0] + "_int8.tflite"
+# **增量特征缓存**: 每个窗口 (按绝对样本序号) 只提取/合成一次, 保留最近 NUM_WINDOWS 个
+feature_cache = StreamingFeatureCache(NUM_WINDOWS, TIME_STEPS, STRIDE, NUM_CHANNELS,
+                                      num_replaced=CHOSSEN_CHANNELS if FEATURE else 0)
+
 # **归一化**
 scaler = StandardScaler()
 
-# **加载 LSTM 模型**
-if os.path.exists(MODEL_PATH):
-    model = load_model(MODEL_PATH)
-    print(" LSTM Model loaded successfully!")
-else:
-    raise FileNotFoundError(f" Model file not found at {MODEL_PATH}")
-
-def detect_action(X):
-    if np.max(X[:,1:4,:,8])>5000 or np.max(X[:,1:4,:,9])>5000:
-        return True
+# **推理进程池**: 0 表示在本进程中运行模型; >0 时启动 WORKER_PROCESSES 个推理进程,
+# 每个进程固定 WORKER_THREADS 个计算线程, 输入经共享内存传递, 不与串口线程争抢 CPU
+WORKER_PROCESSES = 0
+WORKER_THREADS = 1
+WORKER_AFFINITY = "auto"  # None: 不绑核; "auto": 每个推理进程绑定 WORKER_THREADS 个 CPU
+
+# **流式循环模型** (仅 LSTM/GRU 模型, 如 models_lstm.ipynb 的 rnn_emg_model.h5): 用训练好的权重构建有状态副本,
+# 每个 tick 只输入新完成的窗口 (而不是全部 19 个), 动作开始时重置状态; 在预处理线程中运行, 不经过推理进程
+STREAMING = False
+
+# **级联模式**: 先用特征上的 SVM/KNN (train_cascade.py 训练) 预测, 置信度低于 CASCADE_THRESHOLD 时才运行 CNN
+CASCADE = False
+CASCADE_CLASSIFIER = "weights/cascade_svm.joblib"
+CASCADE_THRESHOLD = 0.8
+CASCADE_CRITERION = "probability"  # "probability": 最高概率; "margin": 最高与次高概率之差
+
+# **集成模式**: 每个 tick 在线程池中并发运行 ENSEMBLE_MODELS (输入格式相同的深度模型 + train_cascade.py 的 SVM/KNN),
+# 按权重平均概率 ("mean") 或投票 ("vote") 融合; 超过 ENSEMBLE_DEADLINE_MS 未返回的模型本次不参与融合
+ENSEMBLE = False
+ENSEMBLE_MODELS = [
+    # (名称, 路径, 权重, 输入: "model" 为 (1, 19, 1000) 窗口张量, "features" 为窗口特征向量)
+    # 深度模型的后端由文件扩展名决定: MODEL_BACKEND = "tflite" 时 "cnn" 为导出的 .tflite, 其余 .h5 仍用 keras
+    ("cnn", MODEL_PATH, 1.0, "model"),
+    ("lstm", "weights/rnn_emg_model.h5", 1.0, "model"),
+    ("cnn_lstm_attention", "weights/cnn_lstm_attention_model.h5", 1.0, "model"),
+    ("svm", "weights/cascade_svm.joblib", 0.5, "features"),
+    ("knn", "weights/cascade_knn.joblib", 0.5, "features"),
+]
+ENSEMBLE_FUSION = "mean"
+ENSEMBLE_DEADLINE_MS = 40
+
+# **模型注册表**: 模型在后台线程中加载 (在主程序中启动: 推理进程以 spawn 方式启动, 会重新导入本模块),
+# 采集和预处理线程立即开始工作, 模型就绪前预测线程跳过输入
+def load_deep_model(path, backend):
+    if not os.path.exists(path):
+        raise FileNotFoundError(f" Model file not found at {path}")
+    if WORKER_PROCESSES:
+        predictor = WorkerPool(path, backend, WORKER_PROCESSES, WORKER_THREADS,
+                               cpu_affinity=WORKER_AFFINITY, input_shape=(NUM_WINDOWS, TIME_STEPS * NUM_CHANNELS))
     else:
-        return False
-
-def extract_emg_features(signal, fs=1000):
-    """Extracts features from an EMG signal (100 time steps)."""
-    mav = np.mean(np.abs(signal))  # Mean Absolute Value
-    rms = np.sqrt(np.mean(signal**2))  # Root Mean Square
-    var = np.var(signal)  # Variance
-    zc = np.sum(np.diff(np.sign(signal)) != 0)  # Zero Crossing Count
-    wl = np.sum(np.abs(np.diff(signal)))  # Waveform Length
-
-    # Frequency-domain features using FFT
-    fft_vals = np.fft.rfft(signal)
-    freqs = np.fft.rfftfreq(len(signal), d=1/fs)
-    power = np.abs(fft_vals)**2
-    total_power = np.sum(power)
-    mean_freq = np.sum(freqs * power) / total_power if total_power else 0
-
-    cumsum_power = np.cumsum(power)
-    median_freq = freqs[np.where(cumsum_power >= total_power/2)[0][0]] if total_power else 0
-
-    return np.array([mav, rms, var, zc, wl, mean_freq, median_freq])
-
-def synthesize_time_series(features, num_timesteps=100):
-    """
-    Generates a synthetic time series of length `num_timesteps` from extracted features.
-    Uses Gaussian noise centered at the mean feature values.
-    """
-    synthesized_signal = np.zeros((num_timesteps,))
-    
-    for i, feature in enumerate(features):
-        synthesized_signal += feature * np.sin(2 * np.pi * (i + 1) * np.linspace(0, 1, num_timesteps))
-    
-    return synthesized_signal + np.random.normal(0, 0.05, num_timesteps)  # Add small noise
-
-def replace_emg_with_synthetic_data(X, fs=1000):
-    """
-    Replaces the first 4 EMG channels in each window with synthesized time series
-    generated from extracted features, while keeping the last 6 IMU channels unchanged.
-
-    Parameters:
-    - X: Shape (num_samples, num_windows, num_timesteps, num_channels)
-    - fs: Sampling frequency
-
-    Returns:
-    - X_new: Same shape as X, but with EMG channels replaced by synthetic features
-    """
-    num_samples, num_windows, num_timesteps, num_channels = X.shape
-    new_X = np.copy(X) 
-    for i in range(num_samples):
-        for j in range(num_windows):
-            for ch in range(CHOSSEN_CHANNELS):  # Replace only the first 4 EMG channels
-                features = extract_emg_features(X[i, j, :, ch], fs)
-                new_X[i, j, :, ch] = synthesize_time_series(features, num_timesteps)
-
-    return new_X
+        predictor = load_predictor(path, backend)  # 编译/分配一次并预热, 代替每次 model.predict
+    print(f" LSTM Model loaded successfully! ({path}, {backend}, 推理进程: {WORKER_PROCESSES})")
+    return predictor
+
+def load_ensemble():
+    import joblib
+
+    members = []
+    for name, path, weight, kind in ENSEMBLE_MODELS:
+        if not os.path.exists(path):
+            print(f"[WARNING] 集成模型 {name} 不存在, 跳过: {path}")
+            continue
+        if kind == "features":
+            predictor = ClassifierPredictor(joblib.load(path))
+        else:
+            # 每个成员按自己的文件选择后端 (.tflite: "tflite", .h5: "keras"), 不跟随 MODEL_BACKEND
+            predictor = load_deep_model(path, "tflite" if path.endswith(".tflite") else "keras")
+        members.append((name, predictor, weight, kind))
+    if not members:
+        raise FileNotFoundError("no ENSEMBLE_MODELS found")
+    return EnsemblePredictor(members, ENSEMBLE_FUSION, ENSEMBLE_DEADLINE_MS)
+
+def load_model(spec):
+    # 模式优先级: STREAMING > ENSEMBLE > CASCADE (与预处理/预测线程一致)
+    if STREAMING:
+        if not os.path.exists(spec["path"]):
+            raise FileNotFoundError(f" Model file not found at {spec['path']}")
+        return StreamingRecurrentPredictor(spec["path"])
+    if ENSEMBLE:
+        return load_ensemble()
+    predictor = load_deep_model(spec["path"], spec["backend"])
+    if CASCADE:
+        predictor = load_cascade(CASCADE_CLASSIFIER, predictor, CASCADE_THRESHOLD, CASCADE_CRITERION)
+        print(f" Cascade first stage loaded ({CASCADE_CLASSIFIER}, {CASCADE_CRITERION} >= {CASCADE_THRESHOLD})")
+    return predictor
+
+MODEL_NAME = "emg" if EMG else "all_channels"
+model_registry = ModelRegistry(load_model)
+model_registry.register(MODEL_NAME, MODEL_PATH, MODEL_BACKEND)
+
+# **动作检测门控**: 在采集线程中对陀螺仪通道 (8, 9) 逐块取最大值, 无动作时不做任何窗口/特征/模型计算
+# 与原 detect_action 检查最近 WINDOW_SIZE 个样本中的窗口 1~3 等价: 超阈值样本的"年龄" (距最新样本的样本数)
+# 在 750~949 之间时触发, 即 onset 后第 751 个样本打开, 最后一个超阈值样本后 950 个样本关闭
+GATE_THRESHOLD = 5000
+GATE_WINDOWS = (1, 4)  # 原 detect_action 检查的窗口 [1, 4)
+GATE_DELAY_SAMPLES = WINDOW_SIZE - ((GATE_WINDOWS[1] - 1) * STRIDE + TIME_STEPS) + 1  # 751
+GATE_HOLD_SAMPLES = WINDOW_SIZE - GATE_WINDOWS[0] * STRIDE  # 950
+motion_gate = MotionGate((8, 9), GATE_THRESHOLD, hold_samples=GATE_HOLD_SAMPLES,
+                         delay_samples=GATE_DELAY_SAMPLES)
 
 # **数据采集线程**
 def record_sensor_data():
@@ -117,81 +151,115 @@ def record_sensor_data():
         writer = csv.writer(csvfile)
         writer.writerow(["Time (ms)", "EMG1", "EMG2", "EMG3", "EMG4", "AccX", "AccY", "AccZ", "GyroX", "GyroY", "GyroZ"])
 
-        start_time = datetime.now()
+        decoder = make_decoder(SERIAL_FORMAT, NUM_CHANNELS)
         try:
             while not stop_event.is_set():
-                line = ser.readline().decode('utf-8', errors='ignore').strip()
-                if line:
-                    parts = line.split()
-                    if len(parts) == 10:  # 确保数据完整
-                        try:
-                            emg_values = list(map(int, parts[:4]))  # EMG 数据
-                            imu_values = list(map(int, parts[4:]))  # IMU 数据
-                            elapsed_time = (datetime.now() - start_time).total_seconds() * 1000  # 毫秒
-
-                            # 存入队列
-                            data_buffer.append([elapsed_time] + emg_values + imu_values)
-
-                        except ValueError:
-                            print(f"[WARNING]  数据解析失败: {line}")
+                # 一次读取串口缓冲区中的全部字节, 批量解析所有完整行/帧
+                samples = decoder.feed(read_chunk(ser))
+                if len(samples):
+                    # 存入环形缓冲 (到达时间由 data_buffer.last_append_time 记录)
+                    data_buffer.extend(samples)
+                    motion_gate.update(samples)
 
             print("[INFO] 数据采集完成")
         except KeyboardInterrupt:
             print("\n[INFO] 手动停止数据采集")
         finally:
             ser.close()
-            print("[INFO] 串口已关闭")
+            print(f"[INFO] 串口已关闭 (有效样本: {decoder.decoded}, 解析失败行: {decoder.malformed}, 检测到动作: {motion_gate.onsets})")
 
 # **数据预处理线程**
 def data_preprocess():
-    """ 每 0.1s 读取 5s 数据，并进行窗口化处理 """
+    """ 每到 STRIDE 个新样本 (一个新窗口完成) 就更新特征缓存, 并把最新输入交给预测线程 """
+    next_total = WINDOW_SIZE
     while not stop_event.is_set():
-        if len(data_buffer) < WINDOW_SIZE:
-            time.sleep(0.1)  # 缓冲数据不足时等待
+        # 等待下一个窗口完成 (超时只为检查 stop_event)
+        if not data_buffer.wait_for(next_total, timeout=0.5):
+            continue
+        sample_time = data_buffer.last_append_time  # 触发本次处理的样本到达时间
+        total = data_buffer.total
+        next_total = total - (total - TIME_STEPS) % STRIDE + STRIDE  # 下一个窗口完成时的样本数
+        if FEATURE and not motion_gate.is_open:
+            continue  # 无动作, 跳过特征提取和预测
+
+        # 只处理上次之后新完成的窗口 (空闲后重新打开时最多补算 19 个)
+        new_windows = feature_cache.update(data_buffer)
+        if not feature_cache.ready:
             continue
 
-        recent_data = list(data_buffer)[-WINDOW_SIZE:]
-        data_array = np.array(recent_data)[:, 1:]  # 移除时间戳，只保留 EMG & IMU
-        # data_array = scaler.fit_transform(data_array)
-        windows = []
-        for start in range(0, WINDOW_SIZE - TIME_STEPS + 1, STRIDE):  # 1000-100+1，确保19个窗口
-            windows.append(data_array[start:start + TIME_STEPS])  # (100, 10)
-        
-        windows = np.array(windows)
-        
-        processed_windows = windows.reshape(1, NUM_WINDOWS, TIME_STEPS * NUM_CHANNELS)
-        processed_windows_original = processed_windows.reshape(1, NUM_WINDOWS, TIME_STEPS,  NUM_CHANNELS)
-        if FEATURE:
-            processed_windows = replace_emg_with_synthetic_data(processed_windows_original, fs=1000)
-            flag = detect_action(processed_windows_original)
-            global FLAG 
-            FLAG = flag
-            
-        global processed_data
-        processed_data = processed_windows.reshape(1, NUM_WINDOWS, TIME_STEPS * NUM_CHANNELS)
-
-        time.sleep(0.2)  # 0.2s 运行一次
+        if STREAMING:
+            stream_windows(new_windows, sample_time)
+            continue
+        # 缓存中的最近 19 个窗口 (1, 19, 1000): EMG 已替换为合成数据, IMU 为原始数据
+        model_input = feature_cache.model_input()  # (1, 19, 1000)
+        if CASCADE or ENSEMBLE:
+            # 级联第一阶段 / 集成中 SVM/KNN 的特征: 复用缓存的 EMG 原始信号特征, 只对 IMU 通道提取
+            model_input = (cache_features(feature_cache), model_input)
+        prediction_queue.put((model_input, sample_time))
+
+def stream_windows(new_windows, sample_time):
+    """ 流式模型: 只输入新完成的窗口; 新动作开始时重置状态并输入缓存中的全部窗口 (一次完整前向) """
+    predictor = model_registry.get(MODEL_NAME)
+    if predictor is None:
+        return
+    output = predictor.tick(feature_cache.model_input()[0], new_windows, motion_gate.onset_sample)  # (19, 1000)
+    if output is None:
+        return
+    # 预测线程只负责输出, 结果同样只保留最新的一个
+    prediction_queue.put((output, sample_time))
 
 
 # **预测线程**
 def prediction():
-    """ 每 0.5s 运行一次预测 """
+    """ 取最新的预处理结果运行预测, 并报告从最后一个样本到预测完成的延迟 """
+    latencies = []
+    warming = 0  # 模型加载完成前跳过的输入
+    stage = None  # 级联模式下回答的阶段
     while not stop_event.is_set():
-        if 'processed_data' not in globals() or 'FLAG' not in globals():
-            time.sleep(0.1)
-            continue
-        if not FLAG:
-            print(f"No action")
+        item = prediction_queue.get(timeout=0.5)
+        if item is None:
             continue
-
-        input_data = processed_data  # (1, 19, 1000)
-
-        # **进行预测**
-        predictions = model.predict(input_data,verbose=0)
+        input_data, sample_time = item  # (1, 19, 1000)
+        if STREAMING:
+            predictions = input_data  # 流式模型已在预处理线程中输出 (1, num_classes)
+        else:
+            predictor = model_registry.get(MODEL_NAME)
+            if predictor is None:
+                warming += 1
+                continue
+
+            # **进行预测**
+            if ENSEMBLE:
+                predictions = predictor(*input_data)  # 截止时间内返回的模型的融合结果
+                if predictions is None:
+                    continue
+            elif CASCADE:
+                predictions, stage = predictor(*input_data)  # stage: "fast" (SVM/KNN) 或 "deep" (CNN)
+            else:
+                predictions = predictor(input_data)
         predicted_label = np.argmax(predictions, axis=1)
-        print(f"prediction result: {predicted_label+1}")
-
-        # time.sleep(0.1)  
+        latency_ms = (time.perf_counter() - sample_time) * 1000
+        latencies.append(latency_ms)
+        print(f"prediction result: {predicted_label+1} (延迟 {latency_ms:.1f} ms{', ' + stage if stage else ''})")
+
+    if latencies:
+        print(f"[INFO] 预测 {len(latencies)} 次, 平均延迟 {np.mean(latencies):.1f} ms, "
+              f"最大 {np.max(latencies):.1f} ms, 跳过旧输入 {prediction_queue.coalesced} 个, "
+              f"模型加载中跳过 {warming} 个")
+    predictor = model_registry.get(MODEL_NAME)
+    if ENSEMBLE and hasattr(predictor, "stats"):
+        stats = predictor.stats()
+        print(f"[INFO] 集成: {stats['ticks']} 个 tick, 无模型按时返回 {stats['empty']} 个")
+        for name, member in stats["members"].items():
+            agreement = member["agreement"]
+            print(f"[INFO]   {name}: 参与 {member['share']:.1%}, 超时 {member['late']}, 忙 {member['busy']}, "
+                  f"与融合结果一致 {agreement if agreement is not None else 0:.1%}, "
+                  f"平均 {member['mean_ms'] or 0:.2f} ms, p95 {member['p95_ms'] or 0:.2f} ms")
+    elif CASCADE and hasattr(predictor, "stats"):
+        stats = predictor.stats()
+        for name in ("fast", "deep"):
+            print(f"[INFO] 级联 {name}: {stats[name]['count']} 次 ({stats[name]['share']:.1%}), "
+                  f"平均 {stats[name]['mean_ms'] or 0:.2f} ms, p95 {stats[name]['p95_ms'] or 0:.2f} ms")
 
 # **启动多线程**
 def start_threads():
@@ -215,6 +283,7 @@ def start_threads():
 # **运行主程序**
 if __name__ == "__main__":
     print("[INFO] 启动 EMG 识别系统")
+    model_registry.load_async(MODEL_NAME)  # 后台加载, 不阻塞采集
 
     # 启动线程
     threads = start_threads()
@@ -227,5 +296,8 @@ if __name__ == "__main__":
         stop_event.set()
         for t in threads:
             t.join()
+        model_registry.unload(MODEL_NAME)  # 关闭推理进程 (如有)
+    if model_registry.state(MODEL_NAME) == "failed":
+        print(f"[ERROR] 模型加载失败: {model_registry.status()[MODEL_NAME]['error']}")
 
     print("[INFO] 系统已安全关闭")
@@ -1,34 +1,59 @@
+import os
+import sys
 import serial
 import json
 import asyncio
 import websockets
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # 仓库根目录 (emg_pipeline)
+from emg_pipeline import make_decoder, pack_batch, read_chunk
 
 # 配置 Arduino 串口
 SERIAL_PORT = "COM3"  # 修改为你的 Arduino 端口
 BAUD_RATE = 115200
+SERIAL_FORMAT = "ascii"  # "ascii" 或 "binary" (final_collect.ino 中 BINARY_FRAMES=1)
+
+# WebSocket 发送格式
+WS_FORMAT = "binary"  # "binary": 每条消息打包 BATCH_SIZE 个样本; "json": 每个样本一条 JSON (兼容旧版)
+BATCH_SIZE = 25  # 1 kHz 下约 25ms 发送一次
+GLOVE = "default"  # 手套编号: 后端把该手套的手势和波形发布给 ws/gesture/view/<GLOVE>/ 的所有观看端
 
 # 连接串口
 ser = serial.Serial(SERIAL_PORT, BAUD_RATE, timeout=1)
 
 async def send_data():
-    async with websockets.connect("ws://localhost:8000/ws/gesture/") as websocket:
+    async with websockets.connect(f"ws://localhost:8000/ws/gesture/?glove={GLOVE}") as websocket:
+        decoder = make_decoder(SERIAL_FORMAT, num_channels=10)
+        reported = 0
+        pending = np.empty((0, 10), dtype=np.int16)  # 不足一个 batch 的样本
+        seq = 0  # 已发送样本数, 作为 batch 的起始序号
         while True:
-            line = ser.readline().decode('utf-8', errors='ignore').strip()
-            if line:
-                parts = line.split()
-                if len(parts) == 10:  # 确保数据完整
-                    try:
-                        data = {
-                            "emg": list(map(int, parts[:4])),   # EMG 数据 (4通道)
-                            "acc": list(map(int, parts[4:7])),  # 加速度 (X, Y, Z)
-                            "gyro": list(map(int, parts[7:]))   # 角速度 (X, Y, Z)
-                        }
-
-                        # 发送数据到 WebSocket
-                        await websocket.send(json.dumps(data))
-                        print(f"[INFO] 发送数据: {data}")
-
-                    except ValueError:
-                        print(f"[WARNING] 数据解析失败: {line}")
+            # 读取串口缓冲区全部字节并批量解析, 不完整的行留到下一次
+            samples = decoder.feed(read_chunk(ser))
+            if WS_FORMAT == "binary":
+                pending = np.concatenate((pending, samples.astype(np.int16)))
+                num_full = len(pending) // BATCH_SIZE * BATCH_SIZE
+                for start in range(0, num_full, BATCH_SIZE):
+                    await websocket.send(pack_batch(pending[start:start + BATCH_SIZE], seq))
+                    seq += BATCH_SIZE
+                pending = pending[num_full:]
+                if num_full and seq % 1000 < num_full:
+                    print(f"[INFO] 已发送样本: {seq}")
+            else:
+                for values in samples.tolist():
+                    data = {
+                        "emg": values[:4],   # EMG 数据 (4通道)
+                        "acc": values[4:7],  # 加速度 (X, Y, Z)
+                        "gyro": values[7:]   # 角速度 (X, Y, Z)
+                    }
+
+                    # 发送数据到 WebSocket
+                    await websocket.send(json.dumps(data))
+                    seq += 1
+
+            if decoder.malformed != reported:  # 只汇总计数, 不逐行打印
+                reported = decoder.malformed
+                print(f"[WARNING] 累计解析失败行数: {reported}")
 
 asyncio.run(send_data())
@@ -0,0 +1,103 @@
+import asyncio
+
+import numpy as np
+
+
+class MicroBatcher:
+    """
+    跨连接的微批处理: 收集所有会话提交的 (1, 19, 1000) 输入, 在 max_delay 秒内
+    或凑满 max_batch 个后执行一次批量前向, 再把每一行结果返回给对应的会话.
+
+    上一批在 executor 中运行时新到的输入继续排队, 负载越高批越大, 每个样本的
+    前向开销越低; 低负载时每个输入最多多等 max_delay 秒.
+
+    - run_batch: (N, W, F) -> (N, num_classes) 的批量前向函数
+    - executor: 运行 run_batch 的线程池/进程池
+    """
+
+    def __init__(self, run_batch, executor, max_batch=16, max_delay=0.005):
+        self.run_batch = run_batch
+        self.executor = executor
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = None  # 在事件循环中首次提交时创建
+        self._task = None
+        self._loop = None
+        self.batches = 0
+        self.samples = 0
+
+    @property
+    def mean_batch_size(self):
+        return self.samples / self.batches if self.batches else 0.0
+
+    async def submit(self, x):
+        """提交一个 (1, W, F) 输入, 等待并返回它的 (1, num_classes) 输出"""
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._loop = asyncio.get_running_loop()
+            self._task = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((x, future))
+        return await future
+
+    async def _collect(self, batch):
+        """等待第一个输入, 然后在 max_delay 内继续收集到 batch 中, 最多 max_batch 个"""
+        loop = asyncio.get_running_loop()
+        batch.append(await self._queue.get())
+        deadline = loop.time() + self.max_delay
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        batch = []
+        try:
+            await self._serve(loop, batch)
+        except asyncio.CancelledError:
+            # close(): 取消正在等待的会话, 不让它们永远挂起
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            for _, future in batch:
+                future.cancel()
+            raise
+
+    async def _serve(self, loop, batch):
+        while True:
+            batch.clear()
+            await self._collect(batch)
+            batch[:] = [(x, future) for x, future in batch if not future.done()]  # 已取消的会话
+            if not batch:
+                continue
+            inputs = np.concatenate([x for x, _ in batch], axis=0)
+            try:
+                outputs = await loop.run_in_executor(self.executor, self.run_batch, inputs)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+            self.samples += len(batch)
+            for i, (_, future) in enumerate(batch):
+                if not future.done():
+                    future.set_result(outputs[i:i + 1])
+
+    def close(self):
+        """在事件循环线程中调用; 其他线程 (如模型被换出时) 用 close_threadsafe"""
+        if self._task is not None:
+            self._task.cancel()
+
+    def close_threadsafe(self):
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self.close)
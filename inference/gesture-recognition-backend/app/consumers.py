@@ -1,85 +1,133 @@
+import collections
 import json
+import re
 import numpy as np
 import asyncio
-from collections import deque
+from functools import partial
+from urllib.parse import parse_qs
 from channels.generic.websocket import AsyncWebsocketConsumer
-from tensorflow.keras.models import load_model
+from django.conf import settings
+from emg_pipeline import MotionGate, StreamingFeatureCache, WaveformStream, count_windows, decimation_factor, unpack_batch
 from sklearn.preprocessing import StandardScaler
-# from .your_feature_functions import extract_emg_features, synthesize_time_series, replace_emg_with_synthetic_data  # 导入特征提取和数据处理函数
+from .model_registry import inference_pool, model_registry, user_model
+from .outbound import OutboundQueue
+from .sessions import open_session, session_manager
 
 # **全局变量**
-data_buffer = deque(maxlen=5000)  # 5秒数据缓存
 TIME_STEPS = 100  # LSTM 输入时间步长
 STRIDE = 50  # 计算滑动窗口步长，每50ms一次
 NUM_CHANNELS = 10  # 4 EMG + 6 IMU
-NUM_WINDOWS = (1000 - TIME_STEPS) // STRIDE + 1  # 计算窗口数量
+NUM_WINDOWS = count_windows(1000, TIME_STEPS, STRIDE)  # 计算窗口数量
+# 每个连接一个会话 (app/sessions.py): 自己的 5 秒样本缓冲 (session.buffer)、动作门控和特征缓存,
+# 增量特征缓存每个窗口只提取/合成一次 EMG 特征, 每种模型输入格式 (窗口数, 步长, 替换的 EMG 通道数) 一个
 scaler = StandardScaler()
 
-# **LSTM 模型路径更新**
-MODEL_PATH = r"E:\MSC\AML\AML-Project\weights\cnn_emg_model_emg.h5"  # 更新为正确的模型路径
-model = load_model(MODEL_PATH)
-def detect_action(X):
-    # print(X.shape)
-    if np.max(X[:,0:6,:,8])>5000 or np.max(X[:,0:6,:,9])>5000:
-        return True
-    else:
-        return False
-# **特征提取函数**
-def extract_emg_features(signal, fs=1000):
-    """从EMG信号中提取特征（100个时间步）"""
-    mav = np.mean(np.abs(signal))  # 平均绝对值
-    rms = np.sqrt(np.mean(signal**2))  # 均方根
-    var = np.var(signal)  # 方差
-    zc = np.sum(np.diff(np.sign(signal)) != 0)  # 零交叉计数
-    wl = np.sum(np.abs(np.diff(signal)))  # 波形长度
-
-    # 频率域特征，使用FFT
-    fft_vals = np.fft.rfft(signal)
-    freqs = np.fft.rfftfreq(len(signal), d=1/fs)
-    power = np.abs(fft_vals)**2
-    total_power = np.sum(power)
-    mean_freq = np.sum(freqs * power) / total_power if total_power else 0
-
-    cumsum_power = np.cumsum(power)
-    median_freq = freqs[np.where(cumsum_power >= total_power/2)[0][0]] if total_power else 0
-
-    return np.array([mav, rms, var, zc, wl, mean_freq, median_freq])
-
-# **合成时间序列函数**
-def synthesize_time_series(features, num_timesteps=100):
-    """从提取的特征生成一个合成的时间序列"""
-    synthesized_signal = np.zeros((num_timesteps,))
-    
-    for i, feature in enumerate(features):
-        synthesized_signal += feature * np.sin(2 * np.pi * (i + 1) * np.linspace(0, 1, num_timesteps))
-    
-    return synthesized_signal + np.random.normal(0, 0.05, num_timesteps)  # 添加小噪声
-
-# **替换 EMG 为合成数据函数**
-def replace_emg_with_synthetic_data(X, fs=1000):
-    """
-    用提取的特征生成合成时间序列，替换 EMG 数据
-    """
-    num_samples, num_windows, num_timesteps, num_channels = X.shape
-    new_X = np.copy(X)  # 创建新数组
+# LSTM 模型: 由进程内共享的注册表在后台加载 (settings.GESTURE_MODELS / GESTURE_MODEL), 导入本模块时不加载
+# 连接指定用户时使用其个人模型 (LRU 缓存), 个人模型加载期间使用共享的默认模型 MODEL_NAME
+MODEL_NAME = settings.GESTURE_MODEL
+
+# 动作检测门控: 样本到达时对陀螺仪通道 (8, 9) 取最大值, 无动作时不做窗口/特征/模型计算
+# 与原 detect_action 检查最近 1000 个样本中的窗口 0~5 等价: 超阈值样本的"年龄"在 650~999 之间时触发,
+# 即 onset 后第 651 个样本打开, 最后一个超阈值样本后 1000 个样本关闭
+GATE_THRESHOLD = 5000
+GATE_SPAN = 1000  # detect_action 所看的窗口覆盖的样本数
+GATE_WINDOWS = (0, 6)  # 原 detect_action 检查的窗口 [0, 6)
+GATE_DELAY_SAMPLES = GATE_SPAN - ((GATE_WINDOWS[1] - 1) * STRIDE + TIME_STEPS) + 1  # 651
+GATE_HOLD_SAMPLES = GATE_SPAN - GATE_WINDOWS[0] * STRIDE  # 1000
+
+# 波形通道: 只发送上次推送之后的新样本, 按前端请求的像素宽度 (?pixels=N 或 {"pixels": N}) 做 min/max 抽取,
+# 以二进制帧发送 (格式见 emg_pipeline/waveform.py); 手势结果单独以小 JSON 消息发送
+WAVEFORM_WINDOW = 5000  # 前端显示的样本数
+WAVEFORM_INTERVAL = settings.GESTURE_WAVEFORM_INTERVAL
+
+# 发布/订阅: 手套的生产者连接 (arduino_reader.py, ?glove=<id>) 每个 tick 只计算一次窗口/预测/波形,
+# 发布到频道层的组 gesture.<glove>; 任意数量的观看端连接 ws/gesture/view/<glove>/ 订阅该组, 不做计算
+DEFAULT_GLOVE = "default"
+GLOVE_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")  # 频道层组名只允许 ASCII 字母数字、-、_、.
+
+def glove_group(glove):
+    return f"gesture.{glove}"
 
-    for i in range(num_samples):
-        for j in range(num_windows):
-            for ch in range(4):  # 替换前 4 个 EMG 通道
-                features = extract_emg_features(X[i, j, :, ch], fs)
-                new_X[i, j, :, ch] = synthesize_time_series(features, num_timesteps)
+def producer_group(glove):
+    """生产者的控制组: 观看端在这里告诉生产者自己的像素宽度"""
+    return f"gesture.{glove}.producer"
 
-    return new_X
+def viewer_pixels(pixels):
+    """观看端请求的像素宽度 (?pixels=N 或 {"pixels": N}) 和对应的抽取因子, 不合法时使用默认宽度"""
+    pixels = int(pixels) if str(pixels).isdigit() and int(pixels) > 0 else settings.GESTURE_WAVEFORM_PIXELS
+    return pixels, decimation_factor(WAVEFORM_WINDOW, pixels)
+
+def feature_cache_for(session, spec):
+    """会话中 spec 对应输入格式的特征缓存 (调用时持有 session.lock)"""
+    num_windows = spec.get("input_shape", (NUM_WINDOWS,))[0]
+    key = (num_windows, spec.get("stride", STRIDE), spec.get("num_replaced", 4))
+    feature_caches = session.state["feature_caches"]
+    cache = feature_caches.get(key)
+    if cache is None:
+        cache = feature_caches[key] = StreamingFeatureCache(key[0], TIME_STEPS, key[1], NUM_CHANNELS,
+                                                            num_replaced=key[2])
+    return cache
+
+def prepare_model_input(session, spec, captured=None):
+    """
+    更新 spec 对应的特征缓存 (只处理新完成的窗口) 并组装模型输入, 在推理池线程中运行; 窗口不足时返回 None.
+    captured (dict) 中记录输入最后一个窗口的结束样本序号 "input_end" (buffer.total 计数)
+    """
+    with session.lock:
+        feature_cache = feature_cache_for(session, spec)
+        feature_cache.update(session.buffer)
+        if not feature_cache.ready:
+            return None
+        if captured is not None:
+            captured["input_end"] = feature_cache.end_sample
+        # 最近 num_windows 个窗口: 前 num_replaced 个 EMG 通道已替换为合成数据, 其余为原始数据
+        return feature_cache.model_input()  # 例如 (1, 19, 1000)
 
 class GestureRecognitionConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         await self.accept()
-        print("[INFO] WebSocket 连接已建立")
-        self.running = True
-        asyncio.create_task(self.send_periodic_predictions())
+        # 用户来自路由 ws/gesture/<user>/ 或查询参数 ?user=<user>; 没有个人模型时使用默认模型
+        user = self.scope.get("url_route", {}).get("kwargs", {}).get("user")
+        query = parse_qs(self.scope.get("query_string", b"").decode())
+        if user is None:
+            user = query.get("user", [None])[0]
+        # 手套来自查询参数 ?glove=<id>, 默认为用户名或 "default"
+        glove = query.get("glove", [user or DEFAULT_GLOVE])[0]
+        if not GLOVE_PATTERN.fullmatch(glove):
+            self.session = None
+            await self.send(json.dumps({"error": f"invalid glove id {glove[:80]!r}"}))
+            await self.close(code=4400)
+            return
+        self.group = glove_group(glove)
+        self.session = await open_session(self, user, glove)  # 达到上限或该手套已有生产者时为 None, 连接已关闭
+        if self.session is None:
+            return
+        # 波形按观看端请求的抽取因子分别计算: 每个因子一个 WaveformStream, 同一因子的观看端共用
+        self.waveforms = {}  # factor -> WaveformStream
+        self.waveform_viewers = collections.Counter()  # factor -> 观看端数
+        self.waveform_frames = self.waveform_bytes = 0
+        await self.channel_layer.group_add(producer_group(glove), self.channel_name)
+        await self.channel_layer.group_send(self.group, {"type": "gesture.announce"})  # 已连接的观看端重新报告宽度
+        print(f"[INFO] WebSocket 连接已建立 (会话 {self.session.id}, 手套 {glove}, 活动会话 {len(session_manager.sessions)})")
+        self.session.state["motion_gate"] = MotionGate((8, 9), GATE_THRESHOLD, hold_samples=GATE_HOLD_SAMPLES,
+                                                       delay_samples=GATE_DELAY_SAMPLES)
+        self.session.state["feature_caches"] = {}
+        self.prediction_task = None  # 每个连接最多一个进行中的预测
+        self.skipped_ticks = 0  # 上一次预测未完成而跳过的 tick
+        self.model_state = None  # 上一次发送给前端的模型状态
+        self.model_name = user_model(user) or MODEL_NAME
+        if user and self.model_name == MODEL_NAME:
+            print(f"[WARNING] 用户 {user} 没有个人模型, 使用默认模型 {MODEL_NAME}")
+        self.session.start(self.send_periodic_predictions(), name=f"predict-{self.session.id}")
+        self.session.start(self.send_waveform(), name=f"waveform-{self.session.id}")
 
-    async def receive(self, text_data=None):
-        """接收 Arduino 传感器数据, 存入 buffer"""
+    async def receive(self, text_data=None, bytes_data=None):
+        """接收 Arduino 传感器数据 (二进制批量帧或单样本 JSON), 存入本会话的 buffer"""
+        if self.session is None:
+            return
+        if bytes_data is not None:
+            self.receive_batch(bytes_data)
+            return
         if text_data is None:
             return
         try:
@@ -88,7 +136,8 @@ class GestureRecognitionConsumer(AsyncWebsocketConsumer):
             imu_values = list(map(int, data.get("acc", []) + data.get("gyro", [])))  # 6 轴 IMU
 
             if len(emg_values) == 4 and len(imu_values) == 6:
-                data_buffer.append(emg_values + imu_values)
+                self.session.buffer.append(emg_values + imu_values)
+                self.session.state["motion_gate"].update(emg_values + imu_values)
             else:
                 print(f"[WARNING] 数据长度异常: EMG={len(emg_values)}, IMU={len(imu_values)}")
         except json.JSONDecodeError:
@@ -96,70 +145,213 @@ class GestureRecognitionConsumer(AsyncWebsocketConsumer):
         except Exception as e:
             print(f"[ERROR] 数据处理错误: {e}")
 
+    def receive_batch(self, bytes_data):
+        """解析二进制批量帧 (K 个样本), 一次写入 buffer, 返回写入的样本数"""
+        try:
+            start_seq, samples = unpack_batch(bytes_data)
+        except ValueError as e:
+            print(f"[ERROR] 二进制数据解析失败: {e}")
+            return 0
+        if samples.shape[1] != NUM_CHANNELS:
+            print(f"[WARNING] 通道数异常: {samples.shape[1]}")
+            return 0
+        self.session.seq_tracker.update(start_seq, len(samples))
+        self.session.buffer.extend(samples)
+        self.session.state["motion_gate"].update(samples)
+        return len(samples)
+
     async def send_periodic_predictions(self):
-        """每 0.5 秒进行一次预测并发送数据"""
-        while self.running:
-            if len(data_buffer) >= 5000:
-                await self.run_prediction()
+        """每 0.1 秒触发一次预测; 上一次预测仍在进行时跳过该 tick (下一次使用最新数据)"""
+        while True:  # 会话关闭时取消
+            if len(self.session.buffer) >= 5000:
+                if self.prediction_task is None or self.prediction_task.done():
+                    self.prediction_task = self.session.start(self.run_prediction())
+                else:
+                    self.skipped_ticks += 1
             await asyncio.sleep(0.1)
 
+    async def publish(self, text=None, bytes_data=None, kind="gesture", factor=None):
+        """
+        发布到手套的组, 由频道层转发给所有观看端 (JSON 文本或二进制波形帧); kind 决定观看端的排队策略,
+        波形帧带抽取因子 factor, 观看端只转发自己请求的因子
+        """
+        if text is not None:
+            event = {"type": "gesture.text", "kind": kind, "text": text}
+        else:
+            event = {"type": "gesture.bytes", "kind": "waveform", "factor": factor, "bytes": bytes_data}
+        await self.channel_layer.group_send(self.group, event)
+
+    async def gesture_pixels(self, event):
+        """
+        观看端报告像素宽度 (控制组消息): factor 为其抽取因子 (None 表示观看端断开), previous 为它之前的因子;
+        每个因子保留一个 WaveformStream, 最后一个观看端离开时删除
+        """
+        previous, factor = event.get("previous"), event.get("factor")
+        if previous is not None and self.waveform_viewers[previous] > 0:
+            self.waveform_viewers[previous] -= 1
+            if not self.waveform_viewers[previous]:
+                del self.waveform_viewers[previous]
+                self.waveforms.pop(previous, None)
+        if factor is not None:
+            self.waveform_viewers[factor] += 1
+            if factor not in self.waveforms:  # 新因子从最近 WAVEFORM_WINDOW 个样本开始
+                self.waveforms[factor] = WaveformStream(WAVEFORM_WINDOW, event["pixels"])
+
+    async def send_waveform(self):
+        """
+        每 WAVEFORM_INTERVAL 秒把新到的样本按观看端请求的每个抽取因子以二进制帧发布, 没有新数据时不发送;
+        没有观看端时不做抽取
+        """
+        while True:  # 会话关闭时取消
+            for factor, waveform in list(self.waveforms.items()):
+                message = waveform.next_message(self.session.buffer)
+                if message is None:
+                    continue
+                self.waveform_frames += 1
+                self.waveform_bytes += len(message)
+                try:
+                    await self.publish(bytes_data=message, factor=factor)
+                except Exception as e:
+                    print(f"[ERROR] 波形发布失败: {e}")
+            await asyncio.sleep(WAVEFORM_INTERVAL)
+
     async def run_prediction(self):
         """读取最近 5s 数据，滑动窗口化，并进行预测"""
-        if len(data_buffer) < 5000:
+        buffer = self.session.buffer
+        if len(buffer) < 5000:
             print("[WARNING] 数据不足 5s, 无法进行预测")
             return
+        if not self.session.state["motion_gate"].is_open:
+            return  # 无动作, 不做任何预测计算
+
+        # 模型在后台加载完成前不阻塞, 只在状态变化时通知前端; 个人模型 (重新) 加载期间使用默认模型
+        name = self.model_name
+        model = model_registry.get(name)
+        state = model_registry.state(name)
+        if model is None and name != MODEL_NAME:
+            name = MODEL_NAME
+            model = model_registry.get(name)
+        if state != self.model_state:
+            self.model_state = state
+            if state != "ready":
+                await self.publish(json.dumps({"status": state, "model": self.model_name,
+                                               "fallback": name if model is not None else None}), kind="status")
+        if model is None:
+            return
 
-        # 获取最近 5s 数据
-        recent_data = np.array(list(data_buffer)[-1000:])  # (5000, 10)
-        recent_data_o = np.array(list(data_buffer)[-5000:])  # (5000, 10)
         # scaled_data = scaler.fit_transform(recent_data)  # 归一化
 
-        # 滑动窗口处理
-        windows = []
-        for start in range(0, 5000 - TIME_STEPS + 1, STRIDE):
-            if start + TIME_STEPS <= len(recent_data):  # 确保不会越界
-                windows.append(recent_data[start:start + TIME_STEPS].flatten())
-
-        # 转换成 NumPy 数组
-        windows_array = np.array(windows)
-        
-        # print(f"[DEBUG] 滑动窗口 shape: {windows_array.shape}")
-
-        # 确保形状匹配
-        expected_shape = (NUM_WINDOWS, TIME_STEPS * NUM_CHANNELS)
-        if windows_array.shape != expected_shape:
-            print(f"[ERROR] 数据尺寸不匹配, 当前: {windows_array.shape}, 期望: {expected_shape}")
+        # 特征缓存更新 + 模型前向在推理池中运行; 池已饱和或窗口不足时返回 None, 丢弃本次 tick
+        captured = {}
+        predictions = await inference_pool.predict(
+            partial(prepare_model_input, self.session, model_registry.spec(name), captured), model)
+        if predictions is None:
+            return
+        predicted_class = int(np.argmax(predictions, axis=1))
+
+        print(f"[DEBUG] 预测结果: {predicted_class+1}")
+        # 只发送分类结果, 波形由 send_waveform 增量推送
+        # input_end: 模型输入的结束样本序号 (取输入时的数据, 不是预测完成时的 buffer.total), 用于测量端到端延迟
+        input_end = captured["input_end"]
+        try:
+            await self.publish(json.dumps({
+                "gesture": predicted_class+1,
+                "model": name,
+                "input_end": input_end,
+                "highlight_range": [input_end - 1000, input_end]  # 高亮输入的最近 1s 数据 (绝对样本序号, 与波形帧一致)
+            }))
+        except Exception as e:
+            print(f"[ERROR] 预测结果发布失败: {e}")
+
+    async def disconnect(self, close_code):
+        session = getattr(self, "session", None)
+        if session is None:
+            return
+        print(f"[INFO] WebSocket 断开 (会话 {session.id}, 批量帧丢失样本: {session.seq_tracker.dropped}, "
+              f"检测到动作: {session.state['motion_gate'].onsets}, 会话内存: {session.nbytes / 1024:.0f} KiB, "
+              f"波形: {self.waveform_frames} 帧 / {self.waveform_bytes / 1024:.0f} KiB "
+              f"(抽取因子: {dict(self.waveform_viewers)}), "
+              f"跳过 tick: {self.skipped_ticks}, 推理池丢弃: {inference_pool.dropped}, "
+              f"平均批大小: {inference_pool.mean_batch_size:.2f}, 模型缓存: {model_registry.stats()})")
+        await self.channel_layer.group_discard(producer_group(session.glove), self.channel_name)
+        await session_manager.close(session)  # 取消定时任务和进行中的预测
+        self.session = None
+
+class GestureViewerConsumer(AsyncWebsocketConsumer):
+    """
+    观看端: 订阅手套的组, 转发生产者发布的手势 (JSON) 和波形 (二进制帧), 自己不做任何计算.
+    转发经过本连接的有界发送队列 (app/outbound.py): 慢客户端的波形帧丢弃最旧的、手势只保留最新的,
+    客户端定期确认已处理的消息数 ({"ack": N}), 未确认的消息达到 OUTBOUND_WINDOW 条后新消息只在队列中合并/丢弃,
+    持续卡住 (不再确认) 的客户端被断开, 不影响其他观看端和生产者.
+    像素宽度 (?pixels=N, 图表尺寸变化时 {"pixels": N}) 经控制组告诉生产者, 只转发按自己的抽取因子计算的波形帧.
+    """
+
+    async def connect(self):
+        self.glove = self.scope["url_route"]["kwargs"].get("glove", DEFAULT_GLOVE)
+        if not GLOVE_PATTERN.fullmatch(self.glove):  # 组名须少于 100 个 ASCII 字符, 否则 group_add 会抛出异常
+            await self.accept()
+            await self.send(json.dumps({"error": f"invalid glove id {self.glove[:80]!r}"}))
+            await self.close(code=4400)
             return
+        self.group = glove_group(self.glove)
+        query = parse_qs(self.scope.get("query_string", b"").decode())
+        self.pixels, self.factor = viewer_pixels(query.get("pixels", [None])[0])
+        await self.channel_layer.group_add(self.group, self.channel_name)
+        await self.accept()
+        self.outbound = OutboundQueue(max_depth=settings.OUTBOUND_MAX_DEPTH, stall_timeout=settings.OUTBOUND_STALL_S,
+                                      window=settings.OUTBOUND_WINDOW, totals=session_manager.outbound)
+        self.writer = asyncio.create_task(self.outbound.run(self.send, self.drop))
+        session_manager.add_viewer(self.glove)
+        await self.report_pixels(self.factor)
+        print(f"[INFO] 观看端已连接 (手套 {self.glove}, 生产者: {'有' if self.glove in session_manager.producers else '无/其他进程'})")
+
+    async def report_pixels(self, factor, previous=None):
+        """告诉生产者本连接的抽取因子 (factor=None 表示离开), previous 为之前报告的因子"""
+        await self.channel_layer.group_send(producer_group(self.glove), {
+            "type": "gesture.pixels", "pixels": self.pixels, "factor": factor, "previous": previous})
 
-        # 进行 reshape
+    async def receive(self, text_data=None, bytes_data=None):
+        """观看端不上传数据, 只发送已处理的消息数 {"ack": N} 和图表宽度 {"pixels": N}"""
+        if text_data is None:
+            return
         try:
-            processed_windows = windows_array.reshape(1, NUM_WINDOWS, TIME_STEPS * NUM_CHANNELS)
-            processed_windows_original = processed_windows.reshape(1, NUM_WINDOWS, TIME_STEPS, NUM_CHANNELS)
-            flag = detect_action(processed_windows_original)
-        except ValueError as e:
-            print(f"[ERROR] 维度错误: {e}, windows.shape={windows_array.shape}")
+            data = json.loads(text_data)
+        except json.JSONDecodeError:
+            return
+        if not isinstance(data, dict):
             return
+        if isinstance(data.get("ack"), int):
+            self.outbound.ack(data["ack"])
+        if "pixels" in data:
+            previous = self.factor
+            self.pixels, self.factor = viewer_pixels(data["pixels"])
+            if self.factor != previous:
+                await self.report_pixels(self.factor, previous)
 
-        # 替换 EMG 数据为合成数据
-        processed_windows = replace_emg_with_synthetic_data(processed_windows_original, fs=1000)
+    async def gesture_announce(self, event):
+        """生产者 (重新) 连接: 重新报告像素宽度"""
+        await self.report_pixels(self.factor)
 
-        processed_windows = processed_windows.reshape(1, NUM_WINDOWS, TIME_STEPS * NUM_CHANNELS)
-        # 运行预测
-        predictions = model.predict(processed_windows, verbose=0)
-        predicted_class = int(np.argmax(predictions, axis=1))
+    async def drop(self):
+        """发送队列失效 (客户端卡住或发送出错): 退出组, 不再接收转发, 并关闭连接"""
+        await self.channel_layer.group_discard(self.group, self.channel_name)
+        try:
+            await self.close(code=1008)
+        except Exception as e:  # 连接可能已经断开
+            print(f"[WARNING] 关闭观看端连接失败: {e!r}")
 
-        print(f"[DEBUG] 预测结果: {predicted_class+1}")
-        flag = True
-        if flag:# 发送分类结果 & 波形
-            try:
-                await self.send(json.dumps({
-                    "gesture": predicted_class+1,
-                    "waveform": np.ones_like(recent_data_o[-5000:].transpose()).tolist(),  # 发送最近 5000ms 波形
-                    "highlight_range": [4000, 5000]  # 高亮最近 1s 数据
-                }))
-            except Exception as e:
-                print(f"[ERROR] WebSocket 发送失败: {e}")
+    async def gesture_text(self, event):
+        self.outbound.put(event.get("kind", "gesture"), text=event["text"])
+
+    async def gesture_bytes(self, event):
+        if event.get("factor") == self.factor:  # 其他观看端请求的抽取因子
+            self.outbound.put("waveform", bytes_data=event["bytes"])
 
     async def disconnect(self, close_code):
-        print("[INFO] WebSocket 断开")
-        self.running = False
+        if hasattr(self, "group"):
+            await self.channel_layer.group_discard(self.group, self.channel_name)
+            await self.report_pixels(None, previous=self.factor)
+            session_manager.remove_viewer(self.glove)
+        if hasattr(self, "writer"):
+            self.writer.cancel()
+            print(f"[INFO] 观看端断开 (手套 {self.glove}, 发送队列: {self.outbound.stats()})")
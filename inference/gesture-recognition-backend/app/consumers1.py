@@ -1,27 +1,39 @@
 import json
 import numpy as np
-from collections import deque
 from channels.generic.websocket import AsyncWebsocketConsumer
-from tensorflow.keras.models import load_model
+from emg_pipeline import count_windows, sliding_windows, to_model_input, unpack_batch
 
-# 加载 LSTM 预测模型
-MODEL_PATH = r"E:\MSC\AML\AML-Project\new_collect\fzh\cnn_emg_model.h5"
-model = load_model(MODEL_PATH)
+from .model_registry import model_registry
+from .sessions import open_session, session_manager
+
+# LSTM 预测模型: 由注册表在后台加载 (路径见 settings.GESTURE_MODELS), 导入本模块时不加载
+MODEL_NAME = "fzh"
 
 # **全局变量**
-data_buffer = deque(maxlen=5000)  # 5秒数据缓存
 TIME_STEPS = 100  # LSTM 输入时间步长
 STRIDE = 250  # 调整滑动窗口步长以匹配 NUM_WINDOWS
 NUM_CHANNELS = 10  # 4 EMG + 6 IMU
-NUM_WINDOWS = (5000 - TIME_STEPS) // STRIDE + 1  # 自动计算窗口数量
+NUM_WINDOWS = count_windows(5000, TIME_STEPS, STRIDE)  # 自动计算窗口数量
 
 class GestureRecognitionConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         await self.accept()
-        print("[INFO] WebSocket 连接已建立")
+        self.session = await open_session(self)  # 每个连接自己的 5 秒样本缓冲; 达到上限时为 None, 连接已关闭
+        if self.session is None:
+            return
+        print(f"[INFO] WebSocket 连接已建立 (会话 {self.session.id})")
 
-    async def receive(self, text_data=None):
-        """ 接收 Arduino 传感器数据, 存入 buffer """
+    async def receive(self, text_data=None, bytes_data=None):
+        """ 接收 Arduino 传感器数据 (二进制批量帧或单样本 JSON), 存入本会话的 buffer """
+        if self.session is None:
+            return
+        if bytes_data is not None:
+            before = self.session.buffer.total
+            if self.receive_batch(bytes_data):
+                # 仅每 500 个样本运行一次预测
+                if len(self.session.buffer) >= 5000 and self.session.buffer.total // 500 != before // 500:
+                    await self.run_prediction()
+            return
         if text_data is None:
             return
         try:
@@ -30,48 +42,59 @@ class GestureRecognitionConsumer(AsyncWebsocketConsumer):
             imu_values = list(map(int, data.get("acc", []) + data.get("gyro", [])))  # 6 轴 IMU
 
             if len(emg_values) == 4 and len(imu_values) == 6:
-                data_buffer.append(emg_values + imu_values)
+                self.session.buffer.append(emg_values + imu_values)
             else:
                 print(f"[WARNING] 数据长度异常: EMG={len(emg_values)}, IMU={len(imu_values)}")
 
             # 仅每 500ms 运行一次预测
-            if len(data_buffer) >= 5000 and len(data_buffer) % 500 == 0:
+            if len(self.session.buffer) >= 5000 and self.session.buffer.total % 500 == 0:
                 await self.run_prediction()
         except json.JSONDecodeError:
             print("[ERROR] JSON 数据解析失败")
         except Exception as e:
             print(f"[ERROR] 数据处理错误: {e}")
 
+    def receive_batch(self, bytes_data):
+        """解析二进制批量帧 (K 个样本), 一次写入 buffer, 返回写入的样本数"""
+        try:
+            start_seq, samples = unpack_batch(bytes_data)
+        except ValueError as e:
+            print(f"[ERROR] 二进制数据解析失败: {e}")
+            return 0
+        if samples.shape[1] != NUM_CHANNELS:
+            print(f"[WARNING] 通道数异常: {samples.shape[1]}")
+            return 0
+        self.session.seq_tracker.update(start_seq, len(samples))
+        self.session.buffer.extend(samples)
+        return len(samples)
+
     async def run_prediction(self):
         """ 读取最近 5s 数据，滑动窗口化，并进行预测 """
-        if len(data_buffer) < 5000:
+        if len(self.session.buffer) < 5000:
             print("[WARNING] 数据不足 5s, 无法进行预测")
             return
 
         # 获取最近 5s 数据
-        recent_data = np.array(list(data_buffer)[-5000:])  # (5000, 10)
+        recent_data = self.session.buffer.latest(5000, dtype=np.float64)  # (5000, 10)
 
-        # 滑动窗口处理
-        windows = []
-        for start in range(0, 5000 - TIME_STEPS + 1, STRIDE):
-            windows.append(recent_data[start:start + TIME_STEPS].flatten())  # (1000,)
-
-        # 转换成 NumPy 数组
-        windows_array = np.array(windows)
-        print(f"[DEBUG] 滑动窗口 shape: {windows_array.shape}")
+        # 滑动窗口 (20, 100, 10): 跨步视图, 重叠部分不复制
+        windows = sliding_windows(recent_data, TIME_STEPS, STRIDE)
+        print(f"[DEBUG] 滑动窗口 shape: {windows.shape}")
 
         # 确保形状匹配
-        expected_shape = (NUM_WINDOWS, TIME_STEPS * NUM_CHANNELS)
-
-        # 进行 reshape
-        try:
-            processed_windows = windows_array.reshape(1, NUM_WINDOWS, TIME_STEPS * NUM_CHANNELS)
-        except ValueError as e:
-            print(f"[ERROR] 维度错误: {e}, windows.shape={windows_array.shape}")
+        expected_shape = (NUM_WINDOWS, TIME_STEPS, NUM_CHANNELS)
+        if windows.shape != expected_shape:
+            print(f"[ERROR] 维度错误, 当前: {windows.shape}, 期望: {expected_shape}")
             return
 
-        # 运行预测
-        predictions = model.predict(processed_windows, verbose=0)
+        processed_windows = to_model_input(windows)  # (1, 20, 1000)
+
+        # 运行预测 (模型加载完成前跳过)
+        predictor = model_registry.get(MODEL_NAME)
+        if predictor is None:
+            print(f"[INFO] 模型 {MODEL_NAME} 加载中 ({model_registry.state(MODEL_NAME)})")
+            return
+        predictions = predictor(processed_windows)
         predicted_class = int(np.argmax(predictions, axis=1))
 
         print(f"[DEBUG] 预测结果: {predicted_class}")
@@ -80,11 +103,16 @@ class GestureRecognitionConsumer(AsyncWebsocketConsumer):
         try:
             await self.send(json.dumps({
                 "gesture": predicted_class,
-                "waveform": recent_data[-5000:].tolist(),  # 发送最近 5000ms 波形
+                "waveform": self.session.buffer.latest(5000).tolist(),  # 发送最近 5000ms 波形
                 "highlight_range": [4000, 5000]  # 高亮最近 1s 数据
             }))
         except Exception as e:
             print(f"[ERROR] WebSocket 发送失败: {e}")
 
     async def disconnect(self, close_code):
-        print("[INFO] WebSocket 断开")
+        session = getattr(self, "session", None)
+        if session is None:
+            return
+        print(f"[INFO] WebSocket 断开 (会话 {session.id}, 批量帧丢失样本: {session.seq_tracker.dropped})")
+        await session_manager.close(session)
+        self.session = None
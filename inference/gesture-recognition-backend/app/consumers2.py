@@ -1,38 +1,40 @@
 import json
 import numpy as np
 import asyncio
-from collections import deque
 from channels.generic.websocket import AsyncWebsocketConsumer
-from tensorflow.keras.models import load_model
+from emg_pipeline import count_windows, sliding_windows, to_model_input, unpack_batch
 from sklearn.preprocessing import StandardScaler
 import random
 
-# 加载 LSTM 预测模型
-MODEL_PATH = r"E:\MSC\Spring\AML\GestureLink\weights\cnn_emg_model_all_channels.h5"
-model = load_model(MODEL_PATH)
+from .model_registry import model_registry
+from .sessions import open_session, session_manager
+
+# LSTM 预测模型: 由注册表在后台加载 (路径见 settings.GESTURE_MODELS), 导入本模块时不加载
+MODEL_NAME = "all_channels"
 
 # **全局变量**
-data_buffer = deque(maxlen=5000)  # 5秒数据缓存
 TIME_STEPS = 100  # LSTM 输入时间步长
 STRIDE = 250  # 计算滑动窗口步长
 NUM_CHANNELS = 10  # 4 EMG + 6 IMU
-NUM_WINDOWS = (5000 - TIME_STEPS) // STRIDE + 1  # 计算窗口数量
+NUM_WINDOWS = count_windows(5000, TIME_STEPS, STRIDE)  # 计算窗口数量
 scaler = StandardScaler()
 
 class GestureRecognitionConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         await self.accept()
-        print("[INFO] WebSocket 连接已建立")
-        self.running = True
-        # 模拟数据每 0.5 秒发送一次
-        asyncio.create_task(self.simulate_data())
+        self.session = await open_session(self)  # 每个连接自己的 5 秒样本缓冲; 达到上限时为 None, 连接已关闭
+        if self.session is None:
+            return
+        print(f"[INFO] WebSocket 连接已建立 (会话 {self.session.id})")
+        # 模拟数据每 0.5 秒发送一次 (会话关闭时取消)
+        self.session.start(self.simulate_data(), name=f"simulate-{self.session.id}")
         # 定期发送预测
-        asyncio.create_task(self.send_periodic_predictions())
+        self.session.start(self.send_periodic_predictions(), name=f"predict-{self.session.id}")
         # asyncio.create_task(self.run_prediction())
 
     async def simulate_data(self):
         """ 模拟接收随机生成的数据并存入缓冲区 """
-        while self.running:
+        while True:
             # 模拟随机生成数据
             gesture_data = {
                 "emg": [random.randint(100, 1000) for _ in range(4)],  # 随机生成 4 通道 EMG 数据
@@ -40,12 +42,17 @@ class GestureRecognitionConsumer(AsyncWebsocketConsumer):
                 "gyro": [random.randint(-10000, 10000) for _ in range(3)]  # 随机生成 3 轴陀螺仪数据
             }
             # 将数据添加到缓冲区
-            data_buffer.append(gesture_data["emg"] + gesture_data["acc"] + gesture_data["gyro"])
+            self.session.buffer.append(gesture_data["emg"] + gesture_data["acc"] + gesture_data["gyro"])
             # print(f"[INFO] 模拟数据: {gesture_data}")
             await asyncio.sleep(0.001)  # 每 0.5 秒模拟发送一次数据
 
-    async def receive(self, text_data=None):
-        """ 模拟接收 Arduino 传感器数据, 存入 buffer """
+    async def receive(self, text_data=None, bytes_data=None):
+        """ 接收 Arduino 传感器数据 (二进制批量帧或单样本 JSON), 存入本会话的 buffer """
+        if self.session is None:
+            return
+        if bytes_data is not None:
+            self.receive_batch(bytes_data)
+            return
         if text_data is None:
             return
         try:
@@ -54,7 +61,7 @@ class GestureRecognitionConsumer(AsyncWebsocketConsumer):
             imu_values = list(map(int, data.get("acc", []) + data.get("gyro", [])))  # 6 轴 IMU
 
             if len(emg_values) == 4 and len(imu_values) == 6:
-                data_buffer.append(emg_values + imu_values)
+                self.session.buffer.append(emg_values + imu_values)
             else:
                 print(f"[WARNING] 数据长度异常: EMG={len(emg_values)}, IMU={len(imu_values)}")
         except json.JSONDecodeError:
@@ -62,46 +69,49 @@ class GestureRecognitionConsumer(AsyncWebsocketConsumer):
         except Exception as e:
             print(f"[ERROR] 数据处理错误: {e}")
 
+    def receive_batch(self, bytes_data):
+        """解析二进制批量帧 (K 个样本), 一次写入 buffer, 返回写入的样本数"""
+        try:
+            start_seq, samples = unpack_batch(bytes_data)
+        except ValueError as e:
+            print(f"[ERROR] 二进制数据解析失败: {e}")
+            return 0
+        if samples.shape[1] != NUM_CHANNELS:
+            print(f"[WARNING] 通道数异常: {samples.shape[1]}")
+            return 0
+        self.session.seq_tracker.update(start_seq, len(samples))
+        self.session.buffer.extend(samples)
+        return len(samples)
+
     async def send_periodic_predictions(self):
         """ 每 0.5 秒进行一次预测并发送数据 """
-        while self.running:
-            if len(data_buffer) >= 500:  # 减少阈值以加速测试
+        while True:
+            if len(self.session.buffer) >= 500:  # 减少阈值以加速测试
                 await self.run_prediction()
             await asyncio.sleep(0.5)
 
     async def run_prediction(self):
         """ 读取最近 5s 数据，滑动窗口化，并进行预测 """
-        if len(data_buffer) < 5000:
-            print("[WARNING] 数据不足 5s, 无法进行预测",len(data_buffer))
+        if len(self.session.buffer) < 5000:
+            print("[WARNING] 数据不足 5s, 无法进行预测",len(self.session.buffer))
             return
 
         # 获取最近 5s 数据
-        recent_data = np.array(list(data_buffer)[-5000:])  # (5000, 10)
+        recent_data = self.session.buffer.latest(5000, dtype=np.float64)  # (5000, 10)
         scaled_data = scaler.fit_transform(recent_data)  # 归一化
 
-        # 滑动窗口处理
-        windows = []
-        for start in range(0, 5000 - TIME_STEPS + 1, STRIDE):
-            if start + TIME_STEPS <= len(scaled_data):  # 确保不会越界
-                windows.append(scaled_data[start:start + TIME_STEPS].flatten())
-
-        # 转换成 NumPy 数组
-        windows_array = np.array(windows)
-        windows_array = windows_array[:19,:]
-        # print(f"[DEBUG] 滑动窗口 shape: {windows_array.shape}")
+        # 滑动窗口: 跨步视图, 重叠部分不复制, 取前 19 个窗口 (19, 100, 10)
+        windows = sliding_windows(scaled_data, TIME_STEPS, STRIDE)[:19]
+        # print(f"[DEBUG] 滑动窗口 shape: {windows.shape}")
 
-        # 确保形状匹配
-        expected_shape = (NUM_WINDOWS, TIME_STEPS * NUM_CHANNELS)
+        processed_windows = to_model_input(windows)  # (1, 19, 1000)
 
-        # 进行 reshape
-        try:
-            processed_windows = windows_array.reshape(1, 19, TIME_STEPS * NUM_CHANNELS)
-        except ValueError as e:
-            print(f"[ERROR] 维度错误: {e}, windows.shape={windows_array.shape}")
+        # 运行预测 (模型加载完成前跳过)
+        predictor = model_registry.get(MODEL_NAME)
+        if predictor is None:
+            print(f"[INFO] 模型 {MODEL_NAME} 加载中 ({model_registry.state(MODEL_NAME)})")
             return
-
-        # 运行预测
-        predictions = model.predict(processed_windows, verbose=0)
+        predictions = predictor(processed_windows)
         predicted_class = int(np.argmax(predictions, axis=1))
 
         print(f"[DEBUG] 预测结果: {predicted_class}")
@@ -110,7 +120,7 @@ class GestureRecognitionConsumer(AsyncWebsocketConsumer):
         try:
             await self.send(json.dumps({
                 "gesture": predicted_class,
-                "waveform": recent_data[-5000:].transpose().tolist(),  # 发送最近 5000ms 波形
+                "waveform": self.session.buffer.latest(5000).transpose().tolist(),  # 发送最近 5000ms 波形
                 "highlight_range": [4000, 5000]  # 高亮最近 1s 数据
             }))
             print(f'send class: {predicted_class}')
@@ -118,5 +128,9 @@ class GestureRecognitionConsumer(AsyncWebsocketConsumer):
             print(f"[ERROR] WebSocket 发送失败: {e}")
 
     async def disconnect(self, close_code):
-        print("[INFO] WebSocket 断开")
-        self.running = False
+        session = getattr(self, "session", None)
+        if session is None:
+            return
+        print(f"[INFO] WebSocket 断开 (会话 {session.id}, 批量帧丢失样本: {session.seq_tracker.dropped})")
+        await session_manager.close(session)  # 取消模拟数据和定时预测任务
+        self.session = None
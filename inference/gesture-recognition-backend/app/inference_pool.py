@@ -0,0 +1,123 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from emg_pipeline import WorkerPool, file_size, load_predictor
+
+from .batching import MicroBatcher
+
+POOL_KINDS = ("thread", "process")
+
+
+class InferencePool:
+    """
+    把 CPU 密集的预测计算 (特征缓存更新 + 模型前向) 从 ASGI 事件循环移到线程池/进程池,
+    consumer 只 await 结果, 其他连接的 receive 不再被阻塞.
+
+    模型由 load_model 创建 (作为 ModelRegistry 的 loader), predict 时传入:
+    - kind="thread": 特征和模型都在线程池中运行, 模型在本进程加载一次 (TF 计算时释放 GIL)
+    - kind="process": 特征在线程池中计算, 模型前向在 max_workers 个推理进程 (emg_pipeline.WorkerPool) 中运行,
+      每个进程固定 intra_op_threads 个计算线程, 可选绑核 (cpu_affinity), 输入经共享内存传递
+
+    max_batch > 1 时同一模型的前向经 MicroBatcher 跨连接合并成批 (最多等待 max_delay 秒).
+
+    进行中的任务达到 max_in_flight (默认 max_workers * max_batch) 时 (池已饱和)
+    新的请求直接丢弃并计入 dropped, 下一个 tick 会使用最新数据, 不会积压旧输入.
+    """
+
+    def __init__(self, kind="thread", max_workers=2, max_batch=1, max_delay=0.005,
+                 max_in_flight=None, intra_op_threads=1, cpu_affinity=None, input_shape=(19, 1000)):
+        if kind not in POOL_KINDS:
+            raise ValueError(f"kind must be one of {POOL_KINDS}, got {kind!r}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.intra_op_threads = intra_op_threads
+        self.cpu_affinity = cpu_affinity
+        self.input_shape = input_shape
+        self.max_in_flight = max_in_flight or max_workers * max(max_batch, 1)
+        # 进程模式下线程只负责特征计算和等待推理进程的结果
+        self._threads = ThreadPoolExecutor(max_workers, thread_name_prefix="inference")
+        self._batchers = {}  # id(model) -> MicroBatcher
+        self.in_flight = 0  # 只在事件循环线程中修改
+        self.completed = 0
+        self.dropped = 0
+
+    def load_model(self, spec):
+        """
+        ModelRegistry 的 loader: spec 含 path / backend (可选 input_shape).
+        线程模式在本进程加载; 进程模式启动一组推理进程, 接口相同 (调用时阻塞等待结果).
+        """
+        if self.kind == "process":
+            return WorkerPool(spec["path"], spec["backend"], self.max_workers, self.intra_op_threads,
+                              cpu_affinity=self.cpu_affinity,
+                              input_shape=spec.get("input_shape", self.input_shape),
+                              slot_batch=max(self.max_batch, 1))
+        return load_predictor(spec["path"], spec["backend"])
+
+    @property
+    def saturated(self):
+        return self.in_flight >= self.max_in_flight
+
+    def batcher(self, model):
+        """model 对应的 MicroBatcher (max_batch <= 1 时为 None)"""
+        if self.max_batch <= 1:
+            return None
+        batcher = self._batchers.get(id(model))
+        if batcher is None:
+            batcher = self._batchers[id(model)] = MicroBatcher(
+                model.predict_batch, self._threads, self.max_batch, self.max_delay)
+        return batcher
+
+    def forget(self, model):
+        """模型被卸载/换出时关闭它的 MicroBatcher (可在注册表的加载线程中调用)"""
+        batcher = self._batchers.pop(id(model), None)
+        if batcher is not None:
+            batcher.close_threadsafe()
+
+    def model_bytes(self, model, spec):
+        """注册表的内存估计: 权重文件大小, 进程模式下每个推理进程各有一份"""
+        size = file_size(model, spec)
+        return size * self.max_workers if self.kind == "process" else size
+
+    @property
+    def mean_batch_size(self):
+        batchers = list(self._batchers.values())  # forget() 可能在其他线程中修改
+        batches = sum(b.batches for b in batchers)
+        samples = sum(b.samples for b in batchers)
+        return samples / batches if batches else 1.0
+
+    @staticmethod
+    def _prepare_and_predict(prepare, model):
+        x = prepare()
+        return None if x is None else model(x)
+
+    async def predict(self, prepare, model):
+        """
+        在池中运行 prepare() (返回模型输入或 None) 和 model 的前向, 返回模型输出.
+        prepare() 返回 None 或池已饱和时返回 None.
+        """
+        if self.saturated:
+            self.dropped += 1
+            return None
+        self.in_flight += 1
+        loop = asyncio.get_running_loop()
+        try:
+            batcher = self.batcher(model)
+            if batcher is not None:
+                x = await loop.run_in_executor(self._threads, prepare)
+                if x is None:
+                    return None
+                output = await batcher.submit(x)
+            else:
+                output = await loop.run_in_executor(self._threads, self._prepare_and_predict, prepare, model)
+        finally:
+            self.in_flight -= 1
+        if output is not None:
+            self.completed += 1
+        return output
+
+    def shutdown(self):
+        for batcher in self._batchers.values():
+            batcher.close()
+        self._threads.shutdown(wait=False)
@@ -0,0 +1,59 @@
+import re
+
+from django.conf import settings
+from emg_pipeline import ModelRegistry
+
+from .inference_pool import InferencePool
+
+# 推理池: 特征计算和模型前向在线程池/进程池中运行, 不阻塞事件循环 (配置见 settings.INFERENCE_POOL)
+# 多个连接的同一模型前向由微批处理合并成一次批量前向 (settings.INFERENCE_MAX_BATCH / INFERENCE_MAX_DELAY_MS)
+inference_pool = InferencePool(settings.INFERENCE_POOL, settings.INFERENCE_WORKERS,
+                               max_batch=settings.INFERENCE_MAX_BATCH,
+                               max_delay=settings.INFERENCE_MAX_DELAY_MS / 1000,
+                               intra_op_threads=settings.INFERENCE_INTRA_OP_THREADS,
+                               cpu_affinity=settings.INFERENCE_CPU_AFFINITY)
+
+# 进程内共享的模型注册表: 导入时不加载任何模型 (也不导入 TensorFlow),
+# 第一次 get() 时在后台线程中加载, 加载完成前返回 None.
+# 已加载的模型构成 LRU 缓存 (settings.GESTURE_MODEL_CACHE_SIZE / GESTURE_MODEL_CACHE_MB), 换出时关闭其微批处理
+model_registry = ModelRegistry(inference_pool.load_model,
+                               max_models=settings.GESTURE_MODEL_CACHE_SIZE or None,
+                               max_bytes=int(settings.GESTURE_MODEL_CACHE_MB * 2 ** 20) or None,
+                               sizer=inference_pool.model_bytes,
+                               on_evict=lambda name, model: inference_pool.forget(model))
+
+USER_PATTERN = re.compile(r"^[\w-]+$")  # 用户名只能是目录名, 不能包含路径
+
+
+def model_path(path, backend):
+    if backend == "tflite":
+        path = path.with_name(path.stem + "_int8.tflite")
+    return path
+
+
+for name, info in settings.GESTURE_MODELS.items():
+    info = dict(info)
+    model_registry.register(name, model_path(settings.GESTURE_MODEL_DIR / info.pop("path"), settings.GESTURE_MODEL_BACKEND),
+                            settings.GESTURE_MODEL_BACKEND, pinned=name == settings.GESTURE_MODEL, **info)
+
+
+def user_model(user):
+    """
+    注册 (如未注册) 并返回用户个人模型在注册表中的名称;
+    用户名不合法或 GESTURE_USER_MODEL_DIR/<user>/ 下没有模型文件时返回 None
+    """
+    if not user or not USER_PATTERN.match(user):
+        return None
+    name = f"user:{user}"
+    if name in model_registry:
+        return name
+    for filename, spec in settings.GESTURE_USER_MODEL_FILES.items():
+        path = model_path(settings.GESTURE_USER_MODEL_DIR / user / filename, settings.GESTURE_MODEL_BACKEND)
+        if path.exists():
+            model_registry.register(name, path, settings.GESTURE_MODEL_BACKEND, **spec)
+            return name
+    return None
+
+
+if settings.GESTURE_MODEL_PRELOAD:
+    model_registry.load_async(settings.GESTURE_MODEL)  # 服务启动后立即开始预热, 不阻塞 ASGI 启动
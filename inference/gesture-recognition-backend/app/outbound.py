@@ -0,0 +1,119 @@
+import asyncio
+import collections
+import time
+
+# 每种消息的排队策略: 波形帧按顺序发送, 满时丢弃最旧的; 手势和模型状态只保留最新一条
+POLICIES = {"waveform": "drop_oldest", "gesture": "latest", "status": "latest"}
+
+
+class OutboundQueue:
+    """
+    一个 WebSocket 连接的有界发送队列: put 不等待, 由单独的发送任务 (run) 依次写入连接,
+    慢客户端只会让自己的消息被丢弃/合并, 不会阻塞生产方, 也不会让服务器内存无限增长.
+
+    send() 只要写入服务器的传输缓冲 (Daphne/Twisted, 无上限) 就返回, 并不等客户端读取, 所以背压来自应用层确认:
+    客户端定期发送已处理的消息总数 (ack), 已发送但未确认的消息达到 window 条时不再写入连接,
+    新消息留在本队列中按策略合并/丢弃, 传输缓冲中最多积压 window 条.
+
+    - "drop_oldest": 最多 max_depth 条, 队列满时丢弃最旧的一条 (dropped)
+    - "latest": 每种消息只保留最新一条, 尚未发送的旧消息被覆盖 (coalesced), 优先于 drop_oldest 消息发送
+    - 窗口已满且 stall_timeout 秒内没有新的确认, 或一条消息 stall_timeout 秒内没有写入时视为客户端卡住 (stalled),
+      发送出错 (连接已关闭等) 记为 failed, 两种情况都标记队列关闭 (closed, 之后的 put 被忽略) 并调用 close()
+    - window: 最多未确认的消息数 (None 为不使用确认, 只适用于不会积压的连接)
+    - totals: 可选的 Counter, 汇总所有连接的计数
+    """
+
+    def __init__(self, policies=POLICIES, max_depth=32, stall_timeout=5.0, window=8, totals=None):
+        self.policies = policies
+        self.max_depth = max_depth
+        self.stall_timeout = stall_timeout
+        self.window = window
+        self.totals = totals
+        self.counts = collections.Counter()
+        self.acked = 0  # 客户端确认的消息总数
+        self._queue = collections.deque()  # drop_oldest 消息: (text, bytes)
+        self._latest = {}  # kind -> (text, bytes), latest 消息
+        self._ready = asyncio.Event()
+        self._acked = asyncio.Event()
+        self.closed = False
+        self.created = time.monotonic()
+
+    def __len__(self):
+        return len(self._queue) + len(self._latest)
+
+    @property
+    def unacked(self):
+        return self.counts["sent"] - self.acked
+
+    def _count(self, name):
+        self.counts[name] += 1
+        if self.totals is not None:
+            self.totals[name] += 1
+
+    def put(self, kind, text=None, bytes_data=None):
+        """排队一条文本或二进制消息, 不等待"""
+        if self.closed:
+            return
+        if self.policies.get(kind, "drop_oldest") == "latest":
+            if kind in self._latest:
+                self._count("coalesced")
+            self._latest[kind] = (text, bytes_data)
+        else:
+            if len(self._queue) >= self.max_depth:
+                self._queue.popleft()
+                self._count("dropped")
+            self._queue.append((text, bytes_data))
+        self._ready.set()
+
+    def ack(self, count):
+        """客户端确认已处理的消息总数 (累计, 重复或过期的确认被忽略), 释放发送窗口"""
+        count = min(int(count), self.counts["sent"])
+        if count > self.acked:
+            self.acked = count
+            self._acked.set()
+
+    def _pop(self):
+        if self._latest:
+            kind = next(iter(self._latest))
+            return self._latest.pop(kind)
+        if self._queue:
+            return self._queue.popleft()
+        return None
+
+    async def run(self, send, close):
+        """发送任务: send(text, bytes) 写入连接; 客户端卡住或发送出错时调用 close() 并结束"""
+        while True:
+            await self._ready.wait()
+            if self.window and self.unacked >= self.window:
+                # 窗口已满: 等客户端确认, 期间新消息在队列中合并/丢弃, 不写入连接
+                self._acked.clear()
+                try:
+                    await asyncio.wait_for(self._acked.wait(), self.stall_timeout)
+                except asyncio.TimeoutError:
+                    self._count("stalled")
+                    break
+                continue
+            item = self._pop()
+            if item is None:
+                self._ready.clear()
+                continue
+            try:
+                await asyncio.wait_for(send(*item), self.stall_timeout)
+            except asyncio.TimeoutError:
+                self._count("stalled")
+                break
+            except Exception as e:
+                print(f"[WARNING] WebSocket 发送失败, 关闭连接: {e!r}")
+                self._count("failed")
+                break
+            self._count("sent")
+        self.closed = True
+        self._queue.clear()
+        self._latest.clear()
+        await close()
+
+    def stats(self):
+        return {"queued": len(self), "sent": self.counts["sent"], "unacked": self.unacked,
+                "dropped": self.counts["dropped"],
+                "coalesced": self.counts["coalesced"], "stalled": self.counts["stalled"],
+                "failed": self.counts["failed"]}
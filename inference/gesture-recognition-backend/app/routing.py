@@ -1,6 +1,9 @@
 from django.urls import re_path
-from .consumers import GestureRecognitionConsumer
+from .consumers import GestureRecognitionConsumer, GestureViewerConsumer
 
 websocket_urlpatterns = [
     re_path(r'ws/gesture/$', GestureRecognitionConsumer.as_asgi()),
+    re_path(r'ws/gesture/view/$', GestureViewerConsumer.as_asgi()),  # 订阅默认手套
+    re_path(r'ws/gesture/view/(?P<glove>[^/]+)/$', GestureViewerConsumer.as_asgi()),  # 订阅手套的组 (编号在 connect 中检查)
+    re_path(r'ws/gesture/(?P<user>[\w-]+)/$', GestureRecognitionConsumer.as_asgi()),  # 使用用户的个人模型
 ]
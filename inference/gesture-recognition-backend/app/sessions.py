@@ -0,0 +1,157 @@
+import asyncio
+import collections
+import itertools
+import json
+import threading
+import time
+
+from django.conf import settings
+from emg_pipeline import RingBuffer, SequenceTracker
+
+
+class SessionLimitError(RuntimeError):
+    """会话数或会话内存已达上限, 新连接被拒绝"""
+
+
+class Session:
+    """
+    一个 WebSocket 连接的流状态: 自己的有界样本缓冲 (RingBuffer)、序号检查和后台任务,
+    不同手套的样本不会再交错写入同一个模块级缓冲.
+
+    - buffer: 最近 capacity 个样本
+    - state: consumer 自己的状态 (门控、特征缓存等), 有 nbytes 属性的对象计入会话内存
+    - lock: 推理池线程和事件循环共享 state 时使用
+    """
+
+    def __init__(self, session_id, user=None, capacity=5000, num_channels=10, glove=None):
+        self.id = session_id
+        self.user = user
+        self.glove = glove  # 本会话作为生产者发布的手套 (订阅组), None 表示不发布
+        self.buffer = RingBuffer(capacity, num_channels)
+        self.seq_tracker = SequenceTracker()
+        self.state = {}
+        self.lock = threading.Lock()
+        self.tasks = set()
+        self.created = time.monotonic()
+
+    def start(self, coro, name=None):
+        """在事件循环中启动属于本会话的任务, 会话关闭时取消"""
+        task = asyncio.create_task(coro, name=name)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    @property
+    def nbytes(self):
+        size = self.buffer.nbytes
+        for value in self.state.values():
+            values = value.values() if isinstance(value, dict) else (value,)
+            size += sum(getattr(v, "nbytes", 0) for v in values)
+        return size
+
+    async def close(self):
+        tasks = list(self.tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)  # 等任务真正结束, 不留后台计算
+
+    def status(self):
+        return {
+            "id": self.id,
+            "user": self.user,
+            "glove": self.glove,
+            "age_s": round(time.monotonic() - self.created, 1),
+            "samples": self.buffer.total,
+            "dropped": self.seq_tracker.dropped,
+            "bytes": self.nbytes,
+            "tasks": len(self.tasks),
+        }
+
+
+class SessionManager:
+    """
+    进程内所有 WebSocket 会话: 限制会话数 (max_sessions) 和会话内存总量 (max_bytes),
+    新会话的内存按已有会话的平均值 (没有会话时按空缓冲) 估计.
+    每个手套 (glove) 同时只有一个生产者会话, 观看端订阅手套的组, 不占用会话.
+    """
+
+    def __init__(self, max_sessions=32, max_bytes=None, capacity=5000, num_channels=10):
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.capacity = capacity
+        self.num_channels = num_channels
+        self.sessions = {}
+        self.producers = {}  # glove -> 生产者会话
+        self.viewers = collections.Counter()  # glove -> 本进程内的观看端连接数
+        self.outbound = collections.Counter()  # 所有观看端发送队列的 sent / dropped / coalesced / stalled / failed
+        self._ids = itertools.count(1)
+        self.rejected = 0
+
+    @property
+    def total_bytes(self):
+        return sum(session.nbytes for session in self.sessions.values())
+
+    def _estimate(self):
+        if self.sessions:
+            return self.total_bytes / len(self.sessions)
+        return 2 * self.capacity * self.num_channels * 2  # 空的 int16 镜像缓冲
+
+    def open(self, user=None, glove=None):
+        """创建新会话; 超过会话数或内存上限, 或手套 glove 已有生产者时抛出 SessionLimitError"""
+        if glove is not None and glove in self.producers:
+            self.rejected += 1
+            raise SessionLimitError(f"glove {glove!r} already has a producer (session {self.producers[glove].id})")
+        if self.max_sessions and len(self.sessions) >= self.max_sessions:
+            self.rejected += 1
+            raise SessionLimitError(f"session limit reached ({self.max_sessions})")
+        if self.max_bytes and self.total_bytes + self._estimate() > self.max_bytes:
+            self.rejected += 1
+            raise SessionLimitError(f"session memory limit reached ({self.max_bytes / 2**20:.0f} MiB)")
+        session = Session(next(self._ids), user, self.capacity, self.num_channels, glove)
+        self.sessions[session.id] = session
+        if glove is not None:
+            self.producers[glove] = session
+        return session
+
+    async def close(self, session):
+        """取消会话的任务并释放会话"""
+        self.sessions.pop(session.id, None)
+        if session.glove is not None and self.producers.get(session.glove) is session:
+            del self.producers[session.glove]
+        await session.close()
+
+    def add_viewer(self, glove):
+        self.viewers[glove] += 1
+
+    def remove_viewer(self, glove):
+        self.viewers[glove] -= 1
+        if self.viewers[glove] <= 0:
+            del self.viewers[glove]
+
+    def status(self):
+        return {
+            "active": len(self.sessions),
+            "max_sessions": self.max_sessions,
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "rejected": self.rejected,
+            "gloves": sorted(self.producers),
+            "viewers": dict(self.viewers),
+            "outbound": dict(self.outbound),
+            "sessions": [session.status() for session in self.sessions.values()],
+        }
+
+
+async def open_session(consumer, user=None, glove=None):
+    """consumer 接受连接后调用: 返回新会话; 达到上限时通知客户端并以 1013 (稍后重试) 关闭连接, 返回 None"""
+    try:
+        return session_manager.open(user, glove)
+    except SessionLimitError as e:
+        print(f"[WARNING] 拒绝 WebSocket 连接: {e}")
+        await consumer.send(json.dumps({"error": str(e)}))
+        await consumer.close(code=1013)
+        return None
+
+
+session_manager = SessionManager(settings.SESSION_MAX, int(settings.SESSION_MAX_MB * 2 ** 20) or None,
+                                 settings.SESSION_BUFFER_SAMPLES)
@@ -1,6 +1,8 @@
 from django.urls import path
-from .views import get_gesture_data
+from .views import get_gesture_data, model_health, session_status
 
 urlpatterns = [
     path("gesture/", get_gesture_data, name="gesture-data"),
+    path("health/", model_health, name="model-health"),
+    path("sessions/", session_status, name="session-status"),
 ]
@@ -1,5 +1,20 @@
+from django.conf import settings
 from django.http import JsonResponse
 
+from .model_registry import model_registry
+from .sessions import session_manager
+
 def get_gesture_data(request):
     """Returns sample gesture data for testing."""
     return JsonResponse({"gesture": "wave", "confidence": 0.95})
+
+def model_health(request):
+    """Model registry status; 503 until the default model is loaded."""
+    state = model_registry.state(settings.GESTURE_MODEL)
+    return JsonResponse({"default_model": settings.GESTURE_MODEL, "cache": model_registry.stats(),
+                         "models": model_registry.status()},
+                        status=200 if state == "ready" else 503)
+
+def session_status(request):
+    """Active WebSocket sessions with their memory use, against the session and memory caps."""
+    return JsonResponse(session_manager.status())
@@ -1,12 +1,23 @@
 import os
+import sys
+from pathlib import Path
+
+# consumers import the shared emg_pipeline package from the repository root
+REPO_ROOT = Path(__file__).resolve().parents[3]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
 from django.core.asgi import get_asgi_application
 from channels.routing import ProtocolTypeRouter, URLRouter
-from app.routing import websocket_urlpatterns
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gesture_backend.settings')
+# django.setup() must run before app.routing is imported: the consumers read settings at import time
+django_asgi_app = get_asgi_application()
+
+from app.routing import websocket_urlpatterns  # noqa: E402
 
 application = ProtocolTypeRouter({
-    "http": get_asgi_application(),
+    "http": django_asgi_app,
     "websocket": URLRouter(websocket_urlpatterns),
 })
 
@@ -39,11 +39,81 @@ ROOT_URLCONF = 'gesture_backend.urls'
 ASGI_APPLICATION = 'gesture_backend.asgi.application'
 
 # Channels settings for WebSockets
-CHANNEL_LAYERS = {
-    'default': {
-        'BACKEND': 'channels.layers.InMemoryChannelLayer',
-    },
+# 频道层: 生产者会话把手势和波形发布到手套的组 (gesture.<glove>), 观看端订阅该组
+# "memory": 单进程内存层; "redis": 跨进程 (多个 daphne worker), 本地可用 docker run -p 6379:6379 redis 代替
+GESTURE_CHANNEL_LAYER = os.environ.get('GESTURE_CHANNEL_LAYER', 'memory')
+if GESTURE_CHANNEL_LAYER == 'redis':
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {
+                'hosts': [os.environ.get('REDIS_URL', 'redis://localhost:6379/0')],
+                'capacity': 200,  # 每个观看端最多积压的消息数, 超过后丢弃
+                'expiry': 10,  # 秒, 过期的手势/波形不再发送
+            },
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        },
+    }
+
+# 推理池 (app/inference_pool.py): 预测计算不在事件循环中运行
+# "thread": 线程池 (模型加载一次); "process": 模型前向在推理进程中运行 (每个进程加载一次模型, 共享内存传输输入)
+INFERENCE_POOL = os.environ.get('INFERENCE_POOL', 'thread')
+INFERENCE_WORKERS = int(os.environ.get('INFERENCE_WORKERS', '2'))  # 同时进行的预测数 / 推理进程数, 超出的 tick 被丢弃
+# 仅 "process" 模式: 每个推理进程的计算线程数, 以及是否绑核 ("auto" 为每个进程分配 INTRA_OP_THREADS 个 CPU, 空为不绑)
+INFERENCE_INTRA_OP_THREADS = int(os.environ.get('INFERENCE_INTRA_OP_THREADS', '1'))
+INFERENCE_CPU_AFFINITY = os.environ.get('INFERENCE_CPU_AFFINITY', '') or None
+# 跨连接微批处理 (app/batching.py): 最多合并 INFERENCE_MAX_BATCH 个输入, 最多等待 INFERENCE_MAX_DELAY_MS 毫秒
+# INFERENCE_MAX_BATCH = 1 时关闭, 每个连接单独前向
+INFERENCE_MAX_BATCH = int(os.environ.get('INFERENCE_MAX_BATCH', '16'))
+INFERENCE_MAX_DELAY_MS = float(os.environ.get('INFERENCE_MAX_DELAY_MS', '5'))
+
+# 模型注册表 (app/model_registry.py): 模型在第一次使用 (或启动预加载) 时在后台线程中加载, 每个进程只加载一次
+# 加载完成前 WebSocket 收到 {"status": "warming"}, /api/health/ 返回 503
+GESTURE_MODEL_DIR = Path(os.environ.get('GESTURE_MODEL_DIR', BASE_DIR.parents[1]))
+GESTURE_MODEL_BACKEND = os.environ.get('GESTURE_MODEL_BACKEND', 'keras')  # "tflite": 使用 export_tflite.py 导出的 _int8.tflite
+GESTURE_MODELS = {
+    # 名称: 相对 GESTURE_MODEL_DIR 的 .h5 路径, num_replaced: 替换为合成数据的 EMG 通道数, input_shape: (窗口数, 每窗口特征数)
+    'emg': {'path': 'weights/cnn_emg_model_emg.h5', 'num_replaced': 4, 'input_shape': (19, 1000)},
+    'all_channels': {'path': 'weights/cnn_emg_model_all_channels.h5', 'num_replaced': 0, 'input_shape': (19, 1000)},
+    # stride: 窗口步长 (样本), 与训练时的窗口划分一致
+    'fzh': {'path': 'new_collect/fzh/cnn_emg_model.h5', 'num_replaced': 0, 'input_shape': (20, 1000), 'stride': 250},
+}
+GESTURE_MODEL = os.environ.get('GESTURE_MODEL', 'emg')  # consumers.py 使用的默认模型
+GESTURE_MODEL_PRELOAD = os.environ.get('GESTURE_MODEL_PRELOAD', '1') == '1'  # 启动时在后台加载默认模型
+
+# 每个用户的个人模型: ws/gesture/<user>/ 或 ws/gesture/?user=<user> 使用 GESTURE_USER_MODEL_DIR/<user>/ 下
+# 第一个存在的 GESTURE_USER_MODEL_FILES (new_collect/fzh, gza, wxr, gt), 每个文件有自己的输入格式 (与其训练时的窗口划分一致)
+GESTURE_USER_MODEL_DIR = Path(os.environ.get('GESTURE_USER_MODEL_DIR', GESTURE_MODEL_DIR / 'new_collect'))
+GESTURE_USER_MODEL_FILES = {
+    'cnn_emg_model.h5': {'num_replaced': 0, 'input_shape': (20, 1000), 'stride': 250},
+    # models_lstm.ipynb: 19 个 100 样本 x 10 通道的窗口, 步长 50
+    'rnn_emg_model.h5': {'num_replaced': 0, 'input_shape': (19, 1000), 'stride': 50},
 }
+# 已加载模型的 LRU 缓存上限 (模型个数 / 估计内存 MB, 0 为不限); 默认模型 GESTURE_MODEL 常驻不被换出,
+# 个人模型未加载 (或被换出后重新加载) 期间使用默认模型
+GESTURE_MODEL_CACHE_SIZE = int(os.environ.get('GESTURE_MODEL_CACHE_SIZE', '4'))
+GESTURE_MODEL_CACHE_MB = float(os.environ.get('GESTURE_MODEL_CACHE_MB', '512'))
+
+# WebSocket 会话 (app/sessions.py): 每个连接有自己的样本缓冲和定时任务, 断开时取消
+# 超过 SESSION_MAX 个连接或会话内存总计超过 SESSION_MAX_MB 时拒绝新连接 (关闭码 1013, 稍后重试)
+SESSION_MAX = int(os.environ.get('SESSION_MAX', '32'))
+SESSION_MAX_MB = float(os.environ.get('SESSION_MAX_MB', '64'))
+SESSION_BUFFER_SAMPLES = 5000  # 每个会话保留最近 5 秒数据
+
+# 波形通道: 观看端的默认像素宽度 (观看端可用 ?pixels=N 或 {"pixels": N} 指定, 生产者每种抽取因子计算一次) 和推送间隔 (秒)
+GESTURE_WAVEFORM_PIXELS = int(os.environ.get('GESTURE_WAVEFORM_PIXELS', '1000'))
+GESTURE_WAVEFORM_INTERVAL = float(os.environ.get('GESTURE_WAVEFORM_INTERVAL', '0.05'))
+
+# 观看端发送队列 (app/outbound.py): 最多积压的波形帧数 (约 1.6 秒), 最多未确认 ({"ack": N}) 的已发送消息数,
+# 窗口已满且 OUTBOUND_STALL_S 秒没有新的确认 (或一条消息超过 OUTBOUND_STALL_S 秒未发出) 则断开
+OUTBOUND_MAX_DEPTH = int(os.environ.get('OUTBOUND_MAX_DEPTH', '32'))
+OUTBOUND_WINDOW = int(os.environ.get('OUTBOUND_WINDOW', '8'))
+OUTBOUND_STALL_S = float(os.environ.get('OUTBOUND_STALL_S', '5'))
 
 # Database configuration (using SQLite for simplicity)
 DATABASES = {
@@ -1,11 +1,41 @@
-const WS_URL = "ws://localhost:8000/ws/gesture/";
+// 观看端: 订阅手套的组, 手势和波形由该手套的生产者连接 (arduino_reader.py) 计算一次后转发
+const GLOVE = "default";
+const WS_URL = `ws://localhost:8000/ws/gesture/view/${GLOVE}/`;
+const WAVEFORM_HEADER_SIZE = 10; // uint32 start, uint16 factor, uint16 rows, uint16 channels
+const ACK_DELAY_MS = 50; // 处理完消息后最迟多久向服务器确认 (服务器最多发送 OUTBOUND_WINDOW 条未确认的消息)
+
+// 波形二进制帧 (格式见 emg_pipeline/waveform.py): 只包含上次推送之后的新样本, factor > 1 时每个桶为 min/max 两行
+export function decodeWaveform(buffer) {
+  const view = new DataView(buffer);
+  const start = view.getUint32(0, true);
+  const factor = view.getUint16(4, true);
+  const rows = view.getUint16(6, true);
+  const channels = view.getUint16(8, true);
+  const data = new Int16Array(buffer.slice(WAVEFORM_HEADER_SIZE, WAVEFORM_HEADER_SIZE + 2 * rows * channels));
+  return { start, factor, rows, channels, data };
+}
 
 let socket;
 let reconnectInterval = 3000; // 3秒后尝试重连
 let isManuallyClosed = false; // 标记是否是用户手动关闭
 
-function connectWebSocket() {
-  socket = new WebSocket(WS_URL);
+// pixels: 图表宽度, 生产者按此抽取本连接的波形
+function connectWebSocket(pixels) {
+  if (pixels) {
+    chartPixels = Math.round(pixels);
+  }
+  const ws = new WebSocket(chartPixels ? `${WS_URL}?pixels=${chartPixels}` : WS_URL);
+  socket = ws;
+  socket.binaryType = "arraybuffer";
+  let received = 0; // 本连接已处理的消息数, 累计确认给服务器
+  let ackTimer = null;
+
+  const sendAck = () => {
+    ackTimer = null;
+    if (ws.readyState === WebSocket.OPEN) {
+      ws.send(JSON.stringify({ ack: received }));
+    }
+  };
 
   socket.onopen = () => {
     console.log("✅ WebSocket connected");
@@ -13,6 +43,16 @@ function connectWebSocket() {
   };
 
   socket.onmessage = (event) => {
+    received += 1;
+    if (ackTimer === null) {
+      ackTimer = setTimeout(sendAck, ACK_DELAY_MS);
+    }
+    if (event.data instanceof ArrayBuffer) {
+      if (typeof handleWaveform === "function") {
+        handleWaveform(decodeWaveform(event.data));
+      }
+      return;
+    }
     try {
       const data = JSON.parse(event.data);
       if (typeof handleMessage === "function") {
@@ -28,7 +68,7 @@ function connectWebSocket() {
     console.log("⚠️ WebSocket disconnected", event.reason);
     if (!isManuallyClosed) {
       console.log(`🔄 Attempting to reconnect in ${reconnectInterval / 1000} seconds...`);
-      setTimeout(connectWebSocket, reconnectInterval);
+      setTimeout(() => connectWebSocket(), reconnectInterval);
     }
   };
 
@@ -39,11 +79,25 @@ function connectWebSocket() {
 
 // 默认消息处理函数
 let handleMessage = null;
+let handleWaveform = null;
+let chartPixels = null;
 
 export function setWebSocketListener(callback) {
   handleMessage = callback;
 }
 
+export function setWaveformListener(callback) {
+  handleWaveform = callback;
+}
+
+// 图表宽度变化时通知服务器调整抽取
+export function setWaveformPixels(pixels) {
+  chartPixels = Math.round(pixels);
+  if (socket && socket.readyState === WebSocket.OPEN) {
+    socket.send(JSON.stringify({ pixels: chartPixels }));
+  }
+}
+
 export function closeWebSocket() {
   isManuallyClosed = true;
   if (socket) {
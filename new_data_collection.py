@@ -7,11 +7,11 @@ import cv2
 import random
 import pandas as pd
 import numpy as np
-from datetime import datetime
 from multiprocessing import Process, Event, Manager, freeze_support
 import threading
+from emg_pipeline import make_decoder, read_chunk, spread_timestamps
 
-def record_sensor_data(data_buffer, stop_event, recording_enabled, filename, serial_port, baud_rate):
+def record_sensor_data(data_buffer, stop_event, recording_enabled, filename, serial_port, baud_rate, serial_format="ascii"):
     """ Collect EMG and IMU data when recording is enabled. """
     ser = serial.Serial(serial_port, baud_rate, timeout=1)
     print(f"[INFO] Data will be saved in: {filename}")
@@ -20,23 +20,21 @@ def record_sensor_data(data_buffer, stop_event, recording_enabled, filename, ser
         writer = csv.writer(csvfile)
         writer.writerow(["Time (ms)", "EMG1", "EMG2", "EMG3", "EMG4", "AccX", "AccY", "AccZ", "GyroX", "GyroY", "GyroZ"])
 
-        start_time = datetime.now()
+        decoder = make_decoder(serial_format, num_channels=10)
+        start_time = time.perf_counter()
+        last_time = 0.0
         try:
             while not stop_event.is_set():
-                line = ser.readline().decode('utf-8', errors='ignore').strip()
-                if line:
-                    parts = line.split()
-                    if len(parts) == 10:
-                        try:
-                            emg_values = list(map(int, parts[:4]))  # EMG data
-                            imu_values = list(map(int, parts[4:]))  # IMU data
-                            elapsed_time = (datetime.now() - start_time).total_seconds() * 1000  # ms
-
-                            if recording_enabled.is_set():
-                                data_buffer.append([elapsed_time] + emg_values + imu_values)
-
-                        except ValueError:
-                            print(f"[WARNING] Invalid data: {line}")
+                # Drain the port and parse every complete line in one go
+                samples = decoder.feed(read_chunk(ser))
+                if not len(samples):
+                    continue
+                now = (time.perf_counter() - start_time) * 1000  # ms
+                if recording_enabled.is_set():
+                    elapsed = spread_timestamps(last_time, now, len(samples))
+                    # One IPC round-trip per chunk instead of one per sample
+                    data_buffer.extend([[t] + row for t, row in zip(elapsed.tolist(), samples.tolist())])
+                last_time = now
 
             print("[INFO] Data collection finished")
 
@@ -45,7 +43,7 @@ def record_sensor_data(data_buffer, stop_event, recording_enabled, filename, ser
 
         finally:
             ser.close()
-            print("[INFO] Serial port closed")
+            print(f"[INFO] Serial port closed ({decoder.decoded} samples, {decoder.malformed} malformed lines)")
 
 def run_visual_guidance(data_buffer, stop_event, recording_enabled, filename, root):
     """ Run the visual guidance, controlling when sensor data is collected, and repeat it 25 times. """
@@ -139,6 +137,7 @@ if __name__ == '__main__':
     
     SERIAL_PORT = 'COM3'  # 确保端口正确
     BAUD_RATE = 115200
+    SERIAL_FORMAT = 'ascii'  # 'binary' when final_collect.ino is built with BINARY_FRAMES 1
 
     data_dir = r"new_collect\fzh"
     os.makedirs(data_dir, exist_ok=True)
@@ -151,7 +150,7 @@ if __name__ == '__main__':
 
     process1 = Process(
         target=record_sensor_data, 
-        args=(data_buffer, stop_event, recording_enabled, filename, SERIAL_PORT, BAUD_RATE)  
+        args=(data_buffer, stop_event, recording_enabled, filename, SERIAL_PORT, BAUD_RATE, SERIAL_FORMAT)  
     )
     process1.start()
 
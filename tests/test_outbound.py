@@ -0,0 +1,92 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "inference", "gesture-recognition-backend"))
+
+from app.outbound import OutboundQueue  # noqa: E402
+
+
+class Viewer:
+    """Fake connection: send() returns at once, like Daphne writing into its transport buffer."""
+
+    def __init__(self):
+        self.sent = []
+        self.closed = False
+
+    async def send(self, text=None, bytes_data=None):
+        self.sent.append(text if bytes_data is None else bytes_data)
+
+    async def close(self):
+        self.closed = True
+
+
+async def produce(outbound, ticks, interval=0.001):
+    """One gesture and two waveform frames per tick, like the producer's fan-out."""
+    for i in range(ticks):
+        outbound.put("gesture", text=f"gesture {i}")
+        outbound.put("waveform", bytes_data=b"%d-a" % i)
+        outbound.put("waveform", bytes_data=b"%d-b" % i)
+        await asyncio.sleep(interval)
+
+
+def test_viewer_that_never_acks_is_bounded_then_dropped():
+    async def scenario():
+        viewer = Viewer()
+        outbound = OutboundQueue(max_depth=4, stall_timeout=0.3, window=3)
+        writer = asyncio.create_task(outbound.run(viewer.send, viewer.close))
+        await produce(outbound, 100)
+        # window full: nothing more written to the connection, the queue coalesces / drops instead
+        assert len(viewer.sent) == 3
+        assert outbound.unacked == 3
+        assert len(outbound) <= 1 + 4
+        stats = outbound.stats()
+        assert stats["coalesced"] > 0 and stats["dropped"] > 0
+        assert not viewer.closed
+        await asyncio.wait_for(writer, 2)
+        return viewer, outbound
+
+    viewer, outbound = asyncio.run(scenario())
+    assert viewer.closed and outbound.closed
+    assert outbound.stats()["stalled"] == 1
+    assert len(viewer.sent) == 3
+    outbound.put("gesture", text="late")
+    assert len(outbound) == 0
+
+
+def test_acking_viewer_keeps_receiving_the_latest_messages():
+    async def scenario():
+        viewer = Viewer()
+        outbound = OutboundQueue(max_depth=4, stall_timeout=0.3, window=3)
+        writer = asyncio.create_task(outbound.run(viewer.send, viewer.close))
+
+        async def acknowledge():
+            while not outbound.closed:
+                outbound.ack(len(viewer.sent))
+                await asyncio.sleep(0.002)
+
+        acker = asyncio.create_task(acknowledge())
+        await produce(outbound, 100)
+        await asyncio.sleep(0.05)
+        assert not viewer.closed
+        assert outbound.unacked <= 3
+        assert len(outbound) == 0
+        assert viewer.sent[-1] in ("gesture 99", b"99-b")
+        acker.cancel()
+        writer.cancel()
+        return viewer, outbound
+
+    viewer, outbound = asyncio.run(scenario())
+    assert outbound.stats()["stalled"] == 0
+    assert len(viewer.sent) > 3
+
+
+def test_stale_and_duplicate_acks_are_ignored():
+    outbound = OutboundQueue(window=3)
+    outbound.counts["sent"] = 5
+    outbound.ack(4)
+    outbound.ack(2)
+    assert outbound.acked == 4
+    outbound.ack(9)  # cannot acknowledge more than was sent
+    assert outbound.acked == 5 and outbound.unacked == 0
@@ -0,0 +1,61 @@
+import multiprocessing as mp
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+from emg_pipeline.worker_pool import WorkerPool
+
+
+def collecting_pool(workers):
+    """A WorkerPool with only its result collector running, over the given worker processes."""
+    pool = WorkerPool.__new__(WorkerPool)
+    pool._workers = workers
+    pool._results = queue.Queue()
+    pool._free = queue.Queue()
+    pool._pending = {}
+    pool._lock = threading.Lock()
+    pool._closing = False
+    pool._error = None
+    pool.completed = 0
+    pool._collector = threading.Thread(target=pool._collect, daemon=True)
+    pool._collector.start()
+    return pool
+
+
+def test_dead_worker_fails_pending_calls_while_others_keep_producing():
+    victim = mp.get_context("spawn").Process(target=time.sleep, args=(60,), name="inference-worker-0")
+    victim.start()
+    pool = collecting_pool([victim])
+    stuck = Future()  # the job the victim was running when it died
+    pool._pending[-1] = stuck
+    stop = threading.Event()
+    delivered = []
+
+    def live_worker():  # keeps the result queue non-empty, like a second worker under load
+        job_id = 0
+        while not stop.is_set():
+            future = Future()
+            future.add_done_callback(delivered.append)
+            with pool._lock:
+                pool._pending[job_id] = future
+            pool._results.put((job_id, 0, np.zeros((1, 3), dtype=np.float32)))
+            job_id += 1
+            time.sleep(0.001)
+
+    producer = threading.Thread(target=live_worker, daemon=True)
+    producer.start()
+    try:
+        time.sleep(0.2)
+        victim.kill()
+        victim.join()
+        with pytest.raises(RuntimeError, match="inference-worker-0"):
+            stuck.result(timeout=5)
+        assert delivered  # results kept arriving while the death was detected
+        assert isinstance(pool._error, RuntimeError)
+    finally:
+        stop.set()
+        producer.join()
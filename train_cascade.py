@@ -0,0 +1,83 @@
+"""
+Trains the first stage of the cascade inference mode (CASCADE = True in
+inference.py): a KNN or RBF-SVM on `emg_pipeline.window_features` of the
+processed_gesture_data.npy sets, as in models_KNN_SVM.ipynb.
+
+    python train_cascade.py --data new_collect --classifier svm --output weights/cascade_svm.joblib
+
+Labels use the same encoding as the deep models (np.unique order, like
+LabelEncoder). For each threshold the held-out share answered by the first
+stage and its accuracy there are printed; with --model the full cascade
+(the first stage, then the deep model when unsure) is evaluated too.
+"""
+import argparse
+import os
+import time
+
+import joblib
+import numpy as np
+from sklearn.model_selection import train_test_split
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+
+from emg_pipeline import CascadePredictor, NoiseSource, load_gesture_sets, load_predictor, prepare_model_inputs, window_features
+
+CLASSIFIERS = {
+    "svm": lambda: SVC(kernel="rbf", C=1.0, gamma="scale", probability=True),
+    "knn": lambda: KNeighborsClassifier(n_neighbors=4),
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the fast first stage of the cascade")
+    parser.add_argument("--data", default="new_collect", help="folder with processed_gesture_data.npy sets")
+    parser.add_argument("--classifier", choices=sorted(CLASSIFIERS), default="svm")
+    parser.add_argument("--output", default="weights/cascade_svm.joblib")
+    parser.add_argument("--criterion", choices=("probability", "margin"), default="probability")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.5, 0.6, 0.7, 0.8, 0.9])
+    parser.add_argument("--model", help="deep model (.h5) to evaluate the whole cascade with")
+    parser.add_argument("--num-replaced", type=int, default=4, help="deep model input: channels replaced by synthetic series")
+    args = parser.parse_args()
+
+    X, y = load_gesture_sets(args.data)
+    X = np.nan_to_num(np.asarray(X, dtype=np.float64), nan=0.0)
+    labels = np.unique(y, return_inverse=True)[1]
+    features = window_features(X)
+    print(f"[INFO] 特征: {features.shape}, 类别: {labels.max() + 1}")
+
+    train_idx, test_idx = train_test_split(np.arange(len(X)), test_size=0.2, random_state=42, stratify=labels)
+    classifier = make_pipeline(StandardScaler(), CLASSIFIERS[args.classifier]())
+    classifier.fit(features[train_idx], labels[train_idx])
+
+    cascade = CascadePredictor(classifier, deep=None, criterion=args.criterion)
+    probabilities = classifier.predict_proba(features[test_idx])
+    predicted = classifier.classes_[np.argmax(probabilities, axis=1)]
+    confidence = cascade.confidence(probabilities)
+    correct = predicted == labels[test_idx]
+    print(f"[INFO] {args.classifier} 测试集准确率: {correct.mean():.4f}")
+    print(f"{'threshold':>10}{'fast share':>12}{'fast acc':>10}")
+    for threshold in args.thresholds:
+        confident = confidence >= threshold
+        accuracy = correct[confident].mean() if confident.any() else float("nan")
+        print(f"{threshold:>10.2f}{confident.mean():>12.3f}{accuracy:>10.4f}")
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    joblib.dump(classifier, args.output)
+    print(f"[INFO] 已保存 {args.output}")
+
+    if args.model:
+        deep = load_predictor(args.model)
+        model_inputs = prepare_model_inputs(X[test_idx], args.num_replaced, noise=NoiseSource(seed=0))
+        for threshold in args.thresholds:
+            cascade = CascadePredictor(classifier, deep, threshold, args.criterion,
+                                       num_classes=int(labels.max()) + 1)
+            start = time.perf_counter()
+            outputs = [cascade(f, x[np.newaxis]) for f, x in zip(features[test_idx], model_inputs)]
+            elapsed_ms = (time.perf_counter() - start) * 1000 / len(test_idx)
+            accuracy = np.mean(np.array([np.argmax(o) for o, _ in outputs]) == labels[test_idx])
+            stats = cascade.stats()
+            print(f"[INFO] 阈值 {threshold:.2f}: 准确率 {accuracy:.4f}, 快速阶段 {stats['fast']['share']:.1%}, "
+                  f"平均 {elapsed_ms:.2f} ms/样本 (快速 {stats['fast']['mean_ms'] or 0:.2f} ms, "
+                  f"深度 {stats['deep']['mean_ms'] or 0:.2f} ms)")